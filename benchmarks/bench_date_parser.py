@@ -0,0 +1,116 @@
+"""Entry date parsing throughput: the old per-entry strptime loop vs DateParser.
+
+Usage: python benchmarks/bench_date_parser.py [--entries N] [--repeat R]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import feedparser
+import pytz
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from date_parser import DateParser  # noqa: E402
+
+
+def legacy_parse(entry):
+    """The date handling get_recent_entries used before DateParser"""
+    pub_date = None
+    date_formats = [
+        '%a, %d %b %Y %H:%M:%S %z', '%Y-%m-%dT%H:%M:%S%z', '%Y-%m-%dT%H:%M:%SZ',
+        '%Y-%m-%dT%H:%M:%S.%f%z', '%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%d %H:%M:%S',
+        '%d-%m-%Y %H:%M:%S', '%m/%d/%Y %H:%M:%S', '%Y/%m/%d %H:%M:%S', '%Y-%m-%d %H:%M',
+        '%d-%m-%Y %H:%M', '%m/%d/%Y %H:%M', '%Y/%m/%d %H:%M', '%d.%m.%Y %H:%M:%S',
+        '%d.%m.%Y %H:%M', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d %B %Y %H:%M:%S',
+        '%d %b %Y %H:%M:%S', '%B %d, %Y %H:%M:%S', '%b %d, %Y %H:%M:%S',
+        '%a %b %d %H:%M:%S %Y %z', '%a %b %d %H:%M:%S %Z %Y', '%Y-%m-%d %H:%M:%S %z',
+        '%Y-%m-%d %H:%M:%S %Z', '%Y%m%d%H%M%S', '%Y%m%d %H%M%S',
+        '%a, %d %b %Y %H:%M:%S GMT', '%a, %d %b %Y %H:%M:%S +0000',
+        '%a, %d %b %Y %H:%M:%S PST', '%a, %d %b %Y %H:%M:%S EST',
+    ]
+    date_fields = ['published', 'updated', 'created', 'pubDate', 'date', 'modified',
+                   'dc:date', 'lastBuildDate']
+
+    for field in ['published_parsed', 'updated_parsed', 'created_parsed']:
+        if hasattr(entry, field):
+            time_struct = getattr(entry, field)
+            if time_struct:
+                pub_date = datetime.fromtimestamp(time.mktime(time_struct))
+                pub_date = pytz.UTC.localize(pub_date)
+                break
+
+    if not pub_date:
+        for field in date_fields:
+            if hasattr(entry, field):
+                date_str = getattr(entry, field)
+                for date_format in date_formats:
+                    try:
+                        pub_date = datetime.strptime(date_str, date_format)
+                        if pub_date.tzinfo is None:
+                            pub_date = pytz.UTC.localize(pub_date)
+                        break
+                    except ValueError:
+                        continue
+            if pub_date:
+                break
+    return pub_date
+
+
+def make_entries(count, seed=1):
+    """Entries shaped like feedparser output, in the mix seen in our feeds"""
+    rng = random.Random(seed)
+    base = datetime(2026, 10, 17, 12, 0, 0)
+    entries = []
+    for index in range(count):
+        moment = base - timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+        kind = index % 10
+        entry = feedparser.FeedParserDict(title=f'Entry {index}')
+        if kind < 6:
+            # feedparser understood the date
+            entry['published'] = moment.strftime('%a, %d %b %Y %H:%M:%S +0000')
+            entry['published_parsed'] = moment.timetuple()
+        elif kind < 8:
+            # Formats feedparser leaves unparsed
+            entry['published'] = moment.strftime('%d.%m.%Y %H:%M')
+        elif kind == 8:
+            entry['updated'] = moment.strftime('%Y-%m-%d %H:%M:%S')
+        else:
+            entry['published'] = 'no date'
+        entries.append(entry)
+    return entries
+
+
+def run(label, parse, entries, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for entry in entries:
+            parse(entry)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    rate = len(entries) / best
+    print(f"{label:<12} {best * 1000:9.1f} ms  {rate:12,.0f} entries/sec")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    entries = make_entries(args.entries)
+    date_parser = DateParser()
+    print(f"Parsing dates of {len(entries)} entries (best of {args.repeat})")
+    before = run('legacy', legacy_parse, entries, args.repeat)
+    after = run('DateParser', lambda entry: date_parser.parse_entry(entry, 'feed'),
+                entries, args.repeat)
+    print(f"Speedup: {after / before:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
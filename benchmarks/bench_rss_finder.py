@@ -0,0 +1,245 @@
+"""End-to-end RSSFinder benchmark against the local fixture server.
+
+Each scale gets a cold pass with empty caches. It then gets a warm pass
+that reuses the cold pass's validators and discovery cache, so feeds
+answer 304. Every pass runs in its own process, so peak RSS is measured
+per pass. Per-call latencies are recorded for find_rss_feeds,
+get_recent_entries, generate_report and create_pdf_report. Bytes and
+requests are counted by the server.
+
+Results are saved to benchmarks/results/<commit>.json. --compare prints
+the change against an earlier results file.
+
+Usage: python benchmarks/bench_rss_finder.py [--scales 10,100,1000,5000] [--compare FILE]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+sys.path.insert(0, os.path.join(REPO_DIR, 'src'))
+
+import fixture_server  # noqa: E402
+
+TIMED_METHODS = ('find_rss_feeds', 'get_recent_entries', 'generate_report', 'create_pdf_report')
+
+
+def summarize(durations):
+    """Call count, total and latency percentiles of a list of durations in seconds"""
+    if not durations:
+        return {'calls': 0}
+    values = sorted(durations)
+
+    def percentile(fraction):
+        return values[min(len(values) - 1, int(fraction * len(values)))]
+
+    return {
+        'calls': len(values),
+        'total': sum(values),
+        'p50': percentile(0.50),
+        'p90': percentile(0.90),
+        'p99': percentile(0.99),
+        'max': values[-1],
+    }
+
+
+def instrument(finder, timings):
+    """Wrap the finder's timed methods to record every call's duration"""
+    for name in TIMED_METHODS:
+        method = getattr(finder, name)
+        durations = timings.setdefault(name, [])
+
+        def timed(*args, _method=method, _durations=durations, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                _durations.append(time.perf_counter() - start)
+
+        setattr(finder, name, timed)
+
+
+def server_request(base_url, path):
+    with urllib.request.urlopen(base_url + path) as response:
+        return json.loads(response.read())
+
+
+def run_pass(args):
+    """Child process: one pass of process_urls_from_file, printed as JSON"""
+    import logging
+    from rss_finder import RSSFinder
+
+    logging.basicConfig(level=logging.WARNING)
+    data_dir = os.path.join(args.root, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, 'websites.txt'), 'w', encoding='utf-8') as f:
+        for number in range(args.scale):
+            f.write(fixture_server.site_url(args.base_url, number) + '\n')
+
+    server_request(args.base_url, '/__reset')
+    start = time.perf_counter()
+    finder = RSSFinder(max_workers=args.workers, per_host_limit=args.per_host,
+                       seen_ttl=0, project_root=args.root)
+    timings = {}
+    instrument(finder, timings)
+    finder.process_urls_from_file()
+    elapsed = time.perf_counter() - start
+    traffic = server_request(args.base_url, '/__stats')
+
+    result = {
+        'scale': args.scale,
+        'phase': args.phase,
+        'elapsed': elapsed,
+        'sites_per_sec': args.scale / elapsed,
+        'sites_ok': len(finder.results),
+        'entries': sum(len(result.entries) for result in finder.results),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'requests': traffic['requests'],
+        'bytes': traffic['bytes'],
+        'statuses': traffic['statuses'],
+        'methods': {name: summarize(durations) for name, durations in timings.items()},
+    }
+    print(json.dumps(result))
+
+
+def run_child(base_url, scale, root, phase, args):
+    command = [sys.executable, os.path.abspath(__file__), '--child', '--base-url', base_url,
+               '--scale', str(scale), '--root', root, '--phase', phase,
+               '--workers', str(args.workers), '--per-host', str(args.per_host)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def start_server(args):
+    config = fixture_server.FixtureConfig(args.slow_delay, args.items, args.huge_items,
+                                          args.homepage_bytes, args.recordings)
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=fixture_server.serve, args=(0, config, ready),
+                                      daemon=True)
+    process.start()
+    return process, ready.get(timeout=10)
+
+
+def commit_id():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                check=True, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               cwd=REPO_DIR, capture_output=True, text=True).stdout.strip()
+        return f'{commit}-dirty' if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return time.strftime('run-%Y%m%d-%H%M%S')
+
+
+def print_table(results):
+    print(f"{'scale':>6} {'pass':<5} {'time s':>8} {'sites/s':>8} {'discover p50/p99 ms':>20} "
+          f"{'feed p50/p99 ms':>16} {'report ms':>9} {'pdf ms':>8} {'RSS MB':>7} "
+          f"{'requests':>8} {'MB sent':>8}")
+    for result in results:
+        methods = result['methods']
+
+        def latency(name):
+            stats = methods.get(name, {})
+            if not stats.get('calls'):
+                return '-'
+            return f"{stats['p50'] * 1000:.1f}/{stats['p99'] * 1000:.1f}"
+
+        def total(name):
+            stats = methods.get(name, {})
+            return f"{stats['total'] * 1000:.0f}" if stats.get('calls') else '-'
+
+        print(f"{result['scale']:>6} {result['phase']:<5} {result['elapsed']:>8.2f} "
+              f"{result['sites_per_sec']:>8.1f} {latency('find_rss_feeds'):>20} "
+              f"{latency('get_recent_entries'):>16} {total('generate_report'):>9} "
+              f"{total('create_pdf_report'):>8} {result['peak_rss_mb']:>7.1f} "
+              f"{result['requests']:>8} {result['bytes'] / 1e6:>8.2f}")
+
+
+def print_comparison(results, baseline_file):
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {(r['scale'], r['phase']): r for r in json.load(f)['results']}
+    print(f"\nChange against {os.path.basename(baseline_file)} (negative is better):")
+    for result in results:
+        before = baseline.get((result['scale'], result['phase']))
+        if before is None:
+            continue
+        changes = []
+        for key in ('elapsed', 'peak_rss_mb', 'bytes'):
+            if before[key]:
+                changes.append(f"{key} {100 * (result[key] - before[key]) / before[key]:+.1f}%")
+        print(f"{result['scale']:>6} {result['phase']:<5} " + ', '.join(changes))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default='10,100,1000,5000',
+                        help='comma-separated site counts (default: 10,100,1000,5000)')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--per-host', type=int, default=8,
+                        help='every fixture site shares one host (default: 8)')
+    parser.add_argument('--slow-delay', type=float, default=0.2)
+    parser.add_argument('--items', type=int, default=20)
+    parser.add_argument('--huge-items', type=int, default=2000)
+    parser.add_argument('--homepage-bytes', type=int, default=20000)
+    parser.add_argument('--recordings', help='directory of recorded feed *.xml files to serve')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--no-save', action='store_true', help='do not write a results file')
+    # Internal: run a single pass in this process
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    parser.add_argument('--scale', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--root', help=argparse.SUPPRESS)
+    parser.add_argument('--phase', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        run_pass(args)
+        return
+
+    scales = [int(scale) for scale in args.scales.split(',') if scale.strip()]
+    server, base_url = start_server(args)
+    results = []
+    try:
+        for scale in scales:
+            root = tempfile.mkdtemp(prefix=f'bench_{scale}_')
+            try:
+                for phase in ('cold', 'warm'):
+                    result = run_child(base_url, scale, root, phase, args)
+                    results.append(result)
+                    print(f"{scale} sites, {phase} pass: {result['elapsed']:.2f}s", flush=True)
+            finally:
+                shutil.rmtree(root, ignore_errors=True)
+    finally:
+        server.terminate()
+
+    print()
+    print_table(results)
+    if args.compare:
+        print_comparison(results, args.compare)
+    if not args.no_save:
+        commit = commit_id()
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        results_file = os.path.join(RESULTS_DIR, f'{commit}.json')
+        with open(results_file, 'w', encoding='utf-8') as f:
+            json.dump({'commit': commit, 'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                       'config': {key: value for key, value in vars(args).items()
+                                  if key not in ('child', 'base_url', 'scale', 'root', 'phase')},
+                       'results': results}, f, indent=1)
+        print(f"\nResults saved to {results_file}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Startup cost of the CLI: module import time and `--help` wall time.
+
+Each measurement runs in a fresh interpreter. Also lists which heavy
+dependencies a plain `import rss_finder` pulls in.
+
+Usage: python benchmarks/bench_startup.py [--repeat N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+HEAVY_MODULES = ('reportlab', 'bs4', 'feedparser', 'pytz', 'requests', 'sqlite3')
+
+IMPORT_PROBE = f"""
+import json, sys, time
+sys.path.insert(0, {SRC_DIR!r})
+start = time.perf_counter()
+import rss_finder
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed,
+                   'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def import_time():
+    output = subprocess.run([sys.executable, '-W', 'ignore', '-c', IMPORT_PROBE],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def command_time(args):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-W', 'ignore', os.path.join(SRC_DIR, 'rss_finder.py')]
+                   + args, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    imports = [import_time() for _ in range(args.repeat)]
+    print(f"import rss_finder: median {statistics.median(i['seconds'] for i in imports) * 1000:.0f} ms"
+          f" (heavy modules loaded: {', '.join(imports[0]['loaded']) or 'none'})")
+    help_times = [command_time(['--help']) for _ in range(args.repeat)]
+    print(f"rss_finder.py --help: median {statistics.median(help_times) * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""Local HTTP server with deterministic homepages and feeds for the benchmarks.
+
+Site n is served at /site/<n>/ and links to its feed at /site/<n>/feed.xml.
+The last digit of n picks the endpoint's behaviour:
+
+    0  slow      responses are delayed by --slow-delay seconds
+    1  huge      the feed has --huge-items items
+    2  gzip      bodies are sent with Content-Encoding: gzip
+    3  direct    the site URL is the feed itself (/site/<n>/rss.xml)
+    *  normal
+
+Every response carries an ETag and answers If-None-Match with 304. With
+--recordings, feed bodies are taken round-robin from the recorded *.xml
+files in that directory instead of being generated. GET /__stats returns
+request, byte and status counters as JSON; /__reset clears them.
+
+Usage: python benchmarks/fixture_server.py [--port 8765]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FixtureConfig:
+    def __init__(self, slow_delay=0.2, items=20, huge_items=2000, homepage_bytes=20000,
+                 recordings=None):
+        self.slow_delay = slow_delay
+        self.items = items
+        self.huge_items = huge_items
+        self.homepage_bytes = homepage_bytes
+        self.recorded_feeds = []
+        if recordings:
+            for name in sorted(os.listdir(recordings)):
+                if name.endswith('.xml'):
+                    with open(os.path.join(recordings, name), 'rb') as f:
+                        self.recorded_feeds.append(f.read())
+        # Entry dates are relative to the hour the server started, so bodies
+        # and ETags stay the same for the whole benchmark
+        self.base_time = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def site_kind(number):
+    return {0: 'slow', 1: 'huge', 2: 'gzip', 3: 'direct'}.get(number % 10, 'normal')
+
+
+def site_url(base_url, number):
+    if site_kind(number) == 'direct':
+        return f'{base_url}/site/{number}/rss.xml'
+    return f'{base_url}/site/{number}/'
+
+
+def homepage(number, config):
+    head = (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Site {number}</title>'
+            f'<link rel="alternate" type="application/rss+xml" title="News" '
+            f'href="/site/{number}/feed.xml"></head><body>')
+    filler = f'<p>Filler paragraph for site {number}.</p>'
+    body = filler * max(1, config.homepage_bytes // len(filler))
+    return (head + body + '</body></html>').encode('utf-8')
+
+
+def feed(number, config):
+    if config.recorded_feeds:
+        return config.recorded_feeds[number % len(config.recorded_feeds)]
+    count = config.huge_items if site_kind(number) == 'huge' else config.items
+    items = []
+    for index in range(count):
+        published = format_datetime(config.base_time - timedelta(hours=index))
+        items.append(
+            f'<item><title>Site {number} story {index}</title>'
+            f'<link>http://example.com/{number}/story/{index}</link>'
+            f'<guid isPermaLink="false">site-{number}-story-{index}</guid>'
+            f'<pubDate>{published}</pubDate>'
+            f'<description>&lt;p&gt;Summary of story {index} from site {number}. '
+            f'{"Lorem ipsum dolor sit amet. " * 8}&lt;/p&gt;</description></item>')
+    return (f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+            f'<title>Site {number}</title><link>http://example.com/{number}/</link>'
+            f'<description>Feed {number}</description><ttl>60</ttl>{"".join(items)}'
+            f'</channel></rss>').encode('utf-8')
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.bytes = 0
+            self.statuses = {}
+
+    def record(self, status, size):
+        with self._lock:
+            self.requests += 1
+            self.bytes += size
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {'requests': self.requests, 'bytes': self.bytes,
+                    'statuses': dict(self.statuses)}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        parts = self.path.split('?', 1)[0].strip('/').split('/')
+        if parts == ['__stats']:
+            return self._send(200, json.dumps(server.stats.snapshot()).encode(),
+                              'application/json', record=False)
+        if parts == ['__reset']:
+            server.stats.reset()
+            return self._send(200, b'{}', 'application/json', record=False)
+        if len(parts) < 2 or parts[0] != 'site' or not parts[1].isdigit():
+            return self._send(404, b'not found', 'text/plain')
+
+        number = int(parts[1])
+        kind = site_kind(number)
+        if kind == 'slow':
+            time.sleep(server.config.slow_delay)
+        if len(parts) == 2:
+            body, content_type = homepage(number, server.config), 'text/html; charset=utf-8'
+        elif parts[2] in ('feed.xml', 'rss.xml'):
+            body, content_type = feed(number, server.config), 'application/rss+xml'
+        else:
+            return self._send(404, b'not found', 'text/plain')
+
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+        if self.headers.get('If-None-Match') == etag:
+            return self._send(304, b'', None, etag=etag)
+        encoding = None
+        if kind == 'gzip' and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body, encoding = gzip.compress(body), 'gzip'
+        self._send(200, body, content_type, etag=etag, encoding=encoding)
+
+    def _send(self, status, body, content_type, etag=None, encoding=None, record=True):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        if etag:
+            self.send_header('ETag', etag)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+        if record:
+            self.server.stats.record(status, len(body))
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, config):
+        super().__init__(address, FixtureHandler)
+        self.config = config
+        self.stats = Stats()
+
+    def handle_error(self, request, client_address):
+        # Streaming discovery hangs up once it has read a page's <head>
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def serve(port, config, ready=None):
+    """Run a server until killed; puts its base URL on the `ready` queue"""
+    server = FixtureServer(('127.0.0.1', port), config)
+    if ready is not None:
+        ready.put(server.base_url)
+    server.serve_forever()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--slow-delay', type=float, default=0.2)
+    parser.add_argument('--items', type=int, default=20)
+    parser.add_argument('--huge-items', type=int, default=2000)
+    parser.add_argument('--homepage-bytes', type=int, default=20000)
+    parser.add_argument('--recordings', help='directory of recorded feed *.xml files')
+    return parser.parse_args(argv)
+
+
+def config_from_args(args):
+    return FixtureConfig(args.slow_delay, args.items, args.huge_items, args.homepage_bytes,
+                         args.recordings)
+
+
+def main():
+    args = parse_args()
+    server = FixtureServer(('127.0.0.1', args.port), config_from_args(args))
+    print(f"Serving fixtures on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,383 @@
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+from dedup import entry_keys
+from models import Entry
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT
+);
+CREATE TABLE IF NOT EXISTS sites (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    domain TEXT NOT NULL,
+    last_run INTEGER REFERENCES runs(id),
+    last_error TEXT
+);
+CREATE TABLE IF NOT EXISTS feeds (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    site_id INTEGER REFERENCES sites(id)
+);
+CREATE TABLE IF NOT EXISTS site_feeds (
+    site_id INTEGER NOT NULL REFERENCES sites(id),
+    feed_id INTEGER NOT NULL REFERENCES feeds(id),
+    last_run INTEGER REFERENCES runs(id),
+    PRIMARY KEY (site_id, feed_id)
+);
+CREATE TABLE IF NOT EXISTS fetches (
+    id INTEGER PRIMARY KEY,
+    feed_id INTEGER NOT NULL REFERENCES feeds(id),
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    fetched_at TEXT NOT NULL,
+    status INTEGER,
+    bytes INTEGER,
+    elapsed REAL,
+    not_modified INTEGER NOT NULL DEFAULT 0,
+    entries INTEGER,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    site_id INTEGER REFERENCES sites(id),
+    feed_id INTEGER REFERENCES feeds(id),
+    domain TEXT NOT NULL,
+    guid TEXT,
+    link TEXT,
+    title TEXT,
+    description TEXT,
+    published TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_run INTEGER REFERENCES runs(id)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_link ON articles(link);
+CREATE INDEX IF NOT EXISTS idx_articles_guid ON articles(guid);
+CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published);
+CREATE INDEX IF NOT EXISTS idx_articles_domain ON articles(domain, published);
+CREATE INDEX IF NOT EXISTS idx_articles_run ON articles(last_run, site_id);
+CREATE INDEX IF NOT EXISTS idx_fetches_feed ON fetches(feed_id, fetched_at);
+CREATE INDEX IF NOT EXISTS idx_site_feeds_run ON site_feeds(last_run);
+"""
+
+# Articles seen again keep their id and first_seen but move to the latest run
+INSERT_ARTICLE = """
+INSERT INTO articles (key, site_id, feed_id, domain, guid, link, title, description,
+                      published, first_seen, last_run)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(key) DO UPDATE SET
+    site_id = excluded.site_id,
+    feed_id = excluded.feed_id,
+    domain = excluded.domain,
+    guid = excluded.guid,
+    link = excluded.link,
+    title = excluded.title,
+    description = excluded.description,
+    published = excluded.published,
+    last_run = excluded.last_run
+"""
+
+# Several sites can list the same feed; feeds.site_id only keeps the last one
+SELECT_RUN_SITES = """
+SELECT s.url, f.url FROM site_feeds sf
+JOIN sites s ON s.id = sf.site_id JOIN feeds f ON f.id = sf.feed_id
+JOIN fetches x ON x.feed_id = sf.feed_id AND x.run_id = sf.last_run
+WHERE sf.last_run = ? ORDER BY x.id, s.id
+"""
+
+# Runs stored before site_feeds existed
+SELECT_RUN_SITES_BY_FEED = """
+SELECT s.url, f.url FROM fetches x JOIN feeds f ON f.id = x.feed_id
+JOIN sites s ON s.id = f.site_id WHERE x.run_id = ? ORDER BY x.id
+"""
+
+SELECT_ARTICLES = """
+SELECT a.title, a.link, a.published, a.description, a.guid, f.url
+FROM articles a LEFT JOIN feeds f ON f.id = a.feed_id
+"""
+
+# Copies a run of an attached store named `other` into run :run. The WHERE
+# clauses keep SQLite from reading ON CONFLICT as part of the join
+IMPORT_RUN = (
+    """
+    INSERT INTO sites (url, domain, last_run, last_error)
+    SELECT url, domain, :run, last_error FROM other.sites WHERE last_run = :source
+    ON CONFLICT(url) DO UPDATE SET domain = excluded.domain, last_run = excluded.last_run,
+        last_error = excluded.last_error
+    """,
+    """
+    INSERT INTO feeds (url, site_id)
+    SELECT f.url, s.id FROM other.feeds f
+    JOIN other.sites os ON os.id = f.site_id JOIN sites s ON s.url = os.url
+    WHERE os.last_run = :source
+    ON CONFLICT(url) DO UPDATE SET site_id = excluded.site_id
+    """,
+    """
+    INSERT INTO site_feeds (site_id, feed_id, last_run)
+    SELECT s.id, f.id, :run FROM other.site_feeds sf
+    JOIN other.sites os ON os.id = sf.site_id JOIN sites s ON s.url = os.url
+    JOIN other.feeds ofeed ON ofeed.id = sf.feed_id JOIN feeds f ON f.url = ofeed.url
+    WHERE sf.last_run = :source
+    ON CONFLICT(site_id, feed_id) DO UPDATE SET last_run = excluded.last_run
+    """,
+    """
+    INSERT INTO fetches (feed_id, run_id, fetched_at, status, bytes, elapsed, not_modified,
+                         entries, error)
+    SELECT f.id, :run, x.fetched_at, x.status, x.bytes, x.elapsed, x.not_modified, x.entries,
+           x.error
+    FROM other.fetches x JOIN other.feeds ofeed ON ofeed.id = x.feed_id
+    JOIN feeds f ON f.url = ofeed.url
+    WHERE x.run_id = :source ORDER BY x.id
+    """,
+    """
+    INSERT INTO articles (key, site_id, feed_id, domain, guid, link, title, description,
+                          published, first_seen, last_run)
+    SELECT a.key, s.id, f.id, a.domain, a.guid, a.link, a.title, a.description, a.published,
+           a.first_seen, :run
+    FROM other.articles a JOIN other.sites os ON os.id = a.site_id JOIN sites s ON s.url = os.url
+    LEFT JOIN other.feeds ofeed ON ofeed.id = a.feed_id LEFT JOIN feeds f ON f.url = ofeed.url
+    WHERE a.last_run = :source
+    ON CONFLICT(key) DO UPDATE SET
+        site_id = excluded.site_id,
+        feed_id = excluded.feed_id,
+        domain = excluded.domain,
+        guid = excluded.guid,
+        link = excluded.link,
+        title = excluded.title,
+        description = excluded.description,
+        published = excluded.published,
+        last_run = excluded.last_run
+    """,
+)
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def format_time(moment):
+    """UTC text that sorts in time order"""
+    return moment.astimezone(timezone.utc).strftime(TIME_FORMAT)
+
+
+def parse_time(text):
+    return datetime.strptime(text, TIME_FORMAT).replace(tzinfo=timezone.utc)
+
+
+class ArticleStore:
+    """SQLite store of sites, feeds, fetch attempts and articles across runs.
+
+    Only the thread that opened the store may use it. Article rows are
+    buffered and written `batch_size` at a time in a single transaction.
+    WAL needs shared memory between the processes using the database; a
+    store on a network filesystem, such as a shard's, needs the 'DELETE'
+    rollback journal instead.
+    """
+
+    def __init__(self, db_file, batch_size=500, journal_mode='WAL'):
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.run_id = None
+        self._site_ids = {}
+        self._feed_ids = {}
+        self._pending = []
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_file)
+        self._db.execute(f'PRAGMA journal_mode={journal_mode}')
+        if journal_mode.upper() == 'WAL':
+            # Durable enough with WAL; a rollback journal keeps FULL
+            self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+
+    def start_run(self):
+        now = format_time(datetime.now(timezone.utc))
+        with self._db:
+            self.run_id = self._db.execute('INSERT INTO runs (started_at) VALUES (?)',
+                                           (now,)).lastrowid
+        return self.run_id
+
+    def use_run(self, run_id=None):
+        """Select an earlier run (the latest by default) to read articles from.
+
+        Returns its id, or None if there is no such run.
+        """
+        if run_id is None:
+            row = self._db.execute('SELECT MAX(id) FROM runs').fetchone()
+        else:
+            row = self._db.execute('SELECT id FROM runs WHERE id = ?', (run_id,)).fetchone()
+        self.run_id = row[0] if row else None
+        return self.run_id
+
+    def finish_run(self):
+        self.flush()
+        now = format_time(datetime.now(timezone.utc))
+        with self._db:
+            self._db.execute('UPDATE runs SET finished_at = ? WHERE id = ?', (now, self.run_id))
+
+    def record_site(self, url, domain, error=None):
+        """Insert or update a site for this run and return its id"""
+        self._db.execute(
+            'INSERT INTO sites (url, domain, last_run, last_error) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(url) DO UPDATE SET domain = excluded.domain, '
+            'last_run = excluded.last_run, last_error = excluded.last_error',
+            (url, domain, self.run_id, error))
+        site_id = self._site_ids.get(url)
+        if site_id is None:
+            site_id = self._db.execute('SELECT id FROM sites WHERE url = ?', (url,)).fetchone()[0]
+            self._site_ids[url] = site_id
+        return site_id
+
+    def record_feed(self, url, site_id):
+        """Insert or update a feed of a site for this run and return its id"""
+        self._db.execute(
+            'INSERT INTO feeds (url, site_id) VALUES (?, ?) '
+            'ON CONFLICT(url) DO UPDATE SET site_id = excluded.site_id',
+            (url, site_id))
+        feed_id = self._feed_ids.get(url)
+        if feed_id is None:
+            feed_id = self._db.execute('SELECT id FROM feeds WHERE url = ?', (url,)).fetchone()[0]
+            self._feed_ids[url] = feed_id
+        self._db.execute(
+            'INSERT INTO site_feeds (site_id, feed_id, last_run) VALUES (?, ?, ?) '
+            'ON CONFLICT(site_id, feed_id) DO UPDATE SET last_run = excluded.last_run',
+            (site_id, feed_id, self.run_id))
+        return feed_id
+
+    def record_fetch(self, feed_id, document):
+        """Log a fetch of a feed, given the feed cache's FeedDocument"""
+        self._db.execute(
+            'INSERT INTO fetches (feed_id, run_id, fetched_at, status, bytes, elapsed, '
+            'not_modified, entries, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (feed_id, self.run_id, format_time(datetime.now(timezone.utc)), document.status,
+             document.bytes, document.elapsed, int(document.not_modified), document.total,
+             document.error))
+
+    def add_articles(self, site_id, domain, entries):
+        """Queue entries of a site for the next batch; feeds must be recorded first"""
+        now = format_time(datetime.now(timezone.utc))
+        for entry in entries:
+            self._pending.append((
+                entry_keys(entry)[0], site_id, self._feed_ids.get(entry.feed_url), domain,
+                entry.guid, entry.link, entry.title, entry.description,
+                format_time(entry.published), now, self.run_id))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write queued articles and everything recorded since the last flush"""
+        with self._db:
+            if self._pending:
+                self._db.executemany(INSERT_ARTICLE, self._pending)
+                self._pending = []
+
+    def run_articles(self, site_url, run_id=None):
+        """Entries a site produced in a run (this one by default), grouped by feed"""
+        self.flush()
+        rows = self._db.execute(
+            SELECT_ARTICLES + 'JOIN sites s ON s.id = a.site_id '
+            'WHERE a.last_run = ? AND s.url = ? ORDER BY a.feed_id, a.published DESC',
+            (self.run_id if run_id is None else run_id, site_url))
+        return [self._entry(row) for row in rows]
+
+    def day_articles(self, site_url, run_id=None):
+        """Entries a site collected on the local day of a run (this one by
+        default) up to the end of that run, grouped by feed.
+
+        Articles collected by earlier runs of the same day are included, so
+        the dated outputs of a later run do not lose them.
+        """
+        self.flush()
+        run_id = self.run_id if run_id is None else run_id
+        started_at, finished_at = self._db.execute(
+            'SELECT started_at, finished_at FROM runs WHERE id = ?', (run_id,)).fetchone()
+        day_start = parse_time(started_at).astimezone().replace(hour=0, minute=0, second=0)
+        rows = self._db.execute(
+            SELECT_ARTICLES + 'JOIN sites s ON s.id = a.site_id '
+            'WHERE s.url = ? AND (a.last_run = ? OR a.first_seen BETWEEN ? AND ?) '
+            'ORDER BY a.feed_id, a.published DESC',
+            (site_url, run_id, format_time(day_start),
+             finished_at or format_time(datetime.now(timezone.utc))))
+        return [self._entry(row) for row in rows]
+
+    def run_sites(self, run_id=None):
+        """(site URL, feed URLs) of the sites whose feeds were fetched in a run,
+        in the order they were fetched"""
+        run_id = self.run_id if run_id is None else run_id
+        rows = self._db.execute(SELECT_RUN_SITES, (run_id,)).fetchall()
+        if not rows:
+            rows = self._db.execute(SELECT_RUN_SITES_BY_FEED, (run_id,))
+        sites = {}
+        for site_url, feed_url in rows:
+            feeds = sites.setdefault(site_url, [])
+            if feed_url not in feeds:
+                feeds.append(feed_url)
+        return list(sites.items())
+
+    def run_site_errors(self, run_id=None):
+        """(site URL, error) of the sites that failed in a run"""
+        return self._db.execute(
+            'SELECT url, last_error FROM sites WHERE last_run = ? AND last_error IS NOT NULL '
+            'ORDER BY id', (self.run_id if run_id is None else run_id,)).fetchall()
+
+    def run_fetches(self, run_id=None):
+        """Latest fetch of each feed in a run, by feed URL, as (status, bytes,
+        elapsed, not_modified, entries, error, latest published article)"""
+        rows = self._db.execute(
+            'SELECT f.url, x.status, x.bytes, x.elapsed, x.not_modified, x.entries, x.error, '
+            '(SELECT MAX(a.published) FROM articles a WHERE a.feed_id = f.id) '
+            'FROM fetches x JOIN feeds f ON f.id = x.feed_id WHERE x.run_id = ? ORDER BY x.id',
+            (self.run_id if run_id is None else run_id,))
+        fetches = {}
+        for url, status, size, elapsed, not_modified, entries, error, latest in rows:
+            fetches[url] = (status, size, elapsed, bool(not_modified), entries, error,
+                            parse_time(latest) if latest else None)
+        return fetches
+
+    def import_run(self, db_file, run_id=None):
+        """Copy a run of another store, its latest by default, into the current run.
+
+        Sites, feeds and articles are matched by URL and key, so runs of
+        stores that share sites merge cleanly. Returns the id of the copied
+        run, or None if the other store has no such run.
+        """
+        self.flush()
+        self._db.execute('ATTACH DATABASE ? AS other', (db_file,))
+        try:
+            if run_id is None:
+                row = self._db.execute('SELECT MAX(id) FROM other.runs').fetchone()
+            else:
+                row = self._db.execute('SELECT id FROM other.runs WHERE id = ?',
+                                       (run_id,)).fetchone()
+            if not row or row[0] is None:
+                return None
+            source_run = row[0]
+            with self._db:
+                for statement in IMPORT_RUN:
+                    self._db.execute(statement, {'run': self.run_id, 'source': source_run})
+            return source_run
+        finally:
+            self._db.execute('DETACH DATABASE other')
+
+    def articles_since(self, since, domain=None):
+        """Entries published at or after `since`, newest first"""
+        self.flush()
+        query = SELECT_ARTICLES + 'WHERE a.published >= ?'
+        params = [format_time(since)]
+        if domain:
+            query += ' AND a.domain = ?'
+            params.append(domain)
+        rows = self._db.execute(query + ' ORDER BY a.published DESC', params)
+        return [self._entry(row) for row in rows]
+
+    def _entry(self, row):
+        title, link, published, description, guid, feed_url = row
+        return Entry(title, link, parse_time(published), description, guid or '',
+                     feed_url or '')
+
+    def close(self):
+        self.flush()
+        self._db.close()
@@ -0,0 +1,291 @@
+import calendar
+import re
+from datetime import datetime, timedelta, timezone
+
+# feedparser's own parsed dates, already normalized to UTC
+PARSED_FIELDS = ('published_parsed', 'updated_parsed', 'created_parsed')
+
+# Raw string fields tried when feedparser could not parse a date
+DATE_FIELDS = (
+    'published',
+    'updated',
+    'created',
+    'pubDate',
+    'date',
+    'modified',
+    'dc:date',
+    'lastBuildDate',
+)
+
+# strptime-style formats for dates the fast paths do not recognize. They are
+# compiled to regular expressions once, so a miss costs a regex match rather
+# than a raised ValueError; %z accepts numeric offsets and timezone names.
+FALLBACK_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',             # International standard
+    '%d-%m-%Y %H:%M:%S',             # European style
+    '%m/%d/%Y %H:%M:%S',             # US style
+    '%Y/%m/%d %H:%M:%S',             # Asian style
+    '%Y-%m-%d %H:%M',
+    '%d-%m-%Y %H:%M',
+    '%m/%d/%Y %H:%M',
+    '%Y/%m/%d %H:%M',
+    '%d.%m.%Y %H:%M:%S',             # German/Polish/Russian
+    '%d.%m.%Y %H:%M',
+    '%d/%m/%Y %H:%M:%S',             # British/French
+    '%d/%m/%Y %H:%M',
+    '%d %B %Y %H:%M:%S',             # Full month name
+    '%d %b %Y %H:%M:%S',             # Abbreviated month name
+    '%d %B %Y %H:%M',
+    '%d %b %Y %H:%M',
+    '%d %b %Y, %H:%M',
+    '%B %d, %Y %H:%M:%S',            # US style with month name
+    '%b %d, %Y %H:%M:%S',
+    '%a %b %d %H:%M:%S %Y %z',       # Unix style
+    '%a %b %d %H:%M:%S %z %Y',
+    '%Y-%m-%d %H:%M:%S %z',          # ISO with space
+    '%d.%m.%Y %H:%M %z',
+    '%Y%m%d%H%M%S',                  # Basic compact
+    '%Y%m%d %H%M%S',
+    '%Y-%m-%d',
+    '%d.%m.%Y',
+)
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+# Polish month names (nominative, genitive and abbreviated) to English
+POLISH_MONTHS = {
+    'stycznia': 'Jan', 'styczeń': 'Jan', 'styczen': 'Jan', 'sty': 'Jan',
+    'lutego': 'Feb', 'luty': 'Feb', 'lut': 'Feb',
+    'marca': 'Mar', 'marzec': 'Mar',
+    'kwietnia': 'Apr', 'kwiecień': 'Apr', 'kwiecien': 'Apr', 'kwi': 'Apr',
+    'maja': 'May', 'maj': 'May',
+    'czerwca': 'Jun', 'czerwiec': 'Jun', 'cze': 'Jun',
+    'lipca': 'Jul', 'lipiec': 'Jul', 'lip': 'Jul',
+    'sierpnia': 'Aug', 'sierpień': 'Aug', 'sierpien': 'Aug', 'sie': 'Aug',
+    'września': 'Sep', 'wrzesień': 'Sep', 'wrzesnia': 'Sep', 'wrzesien': 'Sep', 'wrz': 'Sep',
+    'października': 'Oct', 'październik': 'Oct', 'pazdziernika': 'Oct',
+    'pazdziernik': 'Oct', 'paź': 'Oct', 'paz': 'Oct',
+    'listopada': 'Nov', 'listopad': 'Nov', 'lis': 'Nov',
+    'grudnia': 'Dec', 'grudzień': 'Dec', 'grudzien': 'Dec', 'gru': 'Dec',
+}
+
+POLISH_WEEKDAYS = (
+    'poniedziałek', 'poniedzialek', 'wtorek', 'środa', 'sroda', 'czwartek',
+    'piątek', 'piatek', 'sobota', 'niedziela',
+    'pon', 'wt', 'śr', 'sr', 'czw', 'pt', 'sob', 'niedz', 'nd',
+)
+
+# Offsets in minutes for timezone names seen in feeds
+TIMEZONE_OFFSETS = {
+    'UT': 0, 'UTC': 0, 'GMT': 0, 'Z': 0,
+    'EST': -300, 'EDT': -240, 'CST': -360, 'CDT': -300,
+    'MST': -420, 'MDT': -360, 'PST': -480, 'PDT': -420,
+    'BST': 60, 'CET': 60, 'CEST': 120, 'MET': 60, 'MEST': 120,
+    'EET': 120, 'EEST': 180, 'MSK': 180,
+}
+
+_POLISH_MONTH_PATTERN = re.compile(
+    r'\b(' + '|'.join(sorted(POLISH_MONTHS, key=len, reverse=True)) + r')\b\.?',
+    re.IGNORECASE)
+_POLISH_WEEKDAY_PATTERN = re.compile(
+    r'^\s*(' + '|'.join(sorted(POLISH_WEEKDAYS, key=len, reverse=True)) + r')\b\.?,?\s*',
+    re.IGNORECASE)
+
+_FORMAT_DIRECTIVES = {
+    'Y': r'(?P<year>\d{4})',
+    'm': r'(?P<month>\d{1,2})',
+    'd': r'(?P<day>\d{1,2})',
+    'H': r'(?P<hour>\d{1,2})',
+    'M': r'(?P<minute>\d{2})',
+    'S': r'(?P<second>\d{2})',
+    'B': r'(?P<month_name>[A-Za-z]{3,})',
+    'b': r'(?P<month_name>[A-Za-z]{3})\.?',
+    'a': r'[A-Za-z]{2,}\.?,?',
+    'z': r'(?P<tz>[+-]\d{2}:?\d{2}|[A-Za-z]{1,5})',
+}
+
+
+def _compile_format(date_format):
+    """Translate a strptime-style format into a compiled regular expression"""
+    parts = []
+    index = 0
+    while index < len(date_format):
+        char = date_format[index]
+        if char == '%':
+            parts.append(_FORMAT_DIRECTIVES[date_format[index + 1]])
+            index += 2
+            continue
+        parts.append(r'\s+' if char == ' ' else re.escape(char))
+        index += 1
+    return re.compile(''.join(parts), re.IGNORECASE)
+
+
+_FALLBACK_PATTERNS = tuple(_compile_format(date_format) for date_format in FALLBACK_FORMATS)
+
+# RFC 822 / 2822, the RSS 2.0 date format, with an optional weekday
+_RFC822_PATTERN = re.compile(
+    r'^\s*(?:[^\W\d_]+\.?,?\s+)?(\d{1,2})\s+([^\W\d_]{3})[^\W\d_]*\.?\s+(\d{2,4})'
+    r'\s+(\d{1,2}):(\d{2})(?::(\d{2}))?'
+    r'\s*(?:([+-])(\d{2}):?(\d{2})|([A-Za-z]{1,5}))?\s*$')
+
+# ISO 8601 / RFC 3339, the Atom date format
+_ISO8601_PATTERN = re.compile(r'^\s*\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}')
+
+
+def struct_time_to_datetime(time_struct):
+    """Convert a UTC struct_time from feedparser into an aware datetime.
+
+    time.mktime() would interpret it as local time, shifting every date by
+    the machine's UTC offset.
+    """
+    return datetime.fromtimestamp(calendar.timegm(time_struct), tz=timezone.utc)
+
+
+class DateParser:
+    """Normalizes entry dates to aware UTC datetimes.
+
+    Common RSS and Atom formats are handled by dedicated fast paths; other
+    strings are matched against the precompiled fallback formats, starting
+    with the format that last worked for the same feed.
+    """
+
+    def __init__(self):
+        self._last_format = {}
+
+    def parse_entry(self, entry, feed_key=None):
+        """Publication date of a feed entry in UTC, or None"""
+        for field in PARSED_FIELDS:
+            time_struct = entry.get(field)
+            if time_struct:
+                try:
+                    return struct_time_to_datetime(time_struct)
+                except (TypeError, ValueError, OverflowError):
+                    continue
+
+        for field in DATE_FIELDS:
+            date_str = entry.get(field)
+            if date_str and isinstance(date_str, str):
+                parsed = self.parse(date_str, feed_key)
+                if parsed:
+                    return parsed
+        return None
+
+    def parse(self, date_str, feed_key=None):
+        """Parse a date string into an aware UTC datetime, or None"""
+        if _ISO8601_PATTERN.match(date_str):
+            parsed = self._parse_iso8601(date_str)
+            if parsed:
+                return parsed
+
+        text = self._translate_polish(date_str)
+
+        match = _RFC822_PATTERN.match(text)
+        if match:
+            parsed = self._parse_rfc822(match)
+            if parsed:
+                return parsed
+
+        return self._parse_fallback(text, feed_key)
+
+    def _translate_polish(self, date_str):
+        text = _POLISH_WEEKDAY_PATTERN.sub('', date_str)
+        return _POLISH_MONTH_PATTERN.sub(lambda m: POLISH_MONTHS[m.group(1).lower()], text)
+
+    def _parse_iso8601(self, date_str):
+        text = date_str.strip()
+        if text.endswith(('Z', 'z')):
+            text = text[:-1] + '+00:00'
+        try:
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            return None
+        return self._to_utc(parsed)
+
+    def _parse_rfc822(self, match):
+        day, month_name, year, hour, minute, second, sign, tz_hours, tz_minutes, tz_name = \
+            match.groups()
+        month = MONTHS.get(month_name.lower())
+        if month is None:
+            return None
+        year = int(year)
+        if year < 100:
+            year += 2000 if year < 70 else 1900
+
+        if sign:
+            offset = int(tz_hours) * 60 + int(tz_minutes)
+            if sign == '-':
+                offset = -offset
+        elif tz_name:
+            offset = TIMEZONE_OFFSETS.get(tz_name.upper())
+            if offset is None:
+                return None
+        else:
+            offset = 0
+
+        try:
+            parsed = datetime(year, month, int(day), int(hour), int(minute), int(second or 0),
+                              tzinfo=timezone(timedelta(minutes=offset)))
+        except ValueError:
+            return None
+        return parsed.astimezone(timezone.utc)
+
+    def _parse_fallback(self, text, feed_key):
+        text = ' '.join(text.split())
+        last_index = self._last_format.get(feed_key)
+        if last_index is not None:
+            parsed = self._match_format(text, last_index)
+            if parsed:
+                return parsed
+
+        for index in range(len(_FALLBACK_PATTERNS)):
+            if index == last_index:
+                continue
+            parsed = self._match_format(text, index)
+            if parsed:
+                if feed_key is not None:
+                    self._last_format[feed_key] = index
+                return parsed
+        return None
+
+    def _match_format(self, text, index):
+        match = _FALLBACK_PATTERNS[index].fullmatch(text)
+        if not match:
+            return None
+        fields = match.groupdict()
+
+        if fields.get('month_name'):
+            month = MONTHS.get(fields['month_name'][:3].lower())
+            if month is None:
+                return None
+        else:
+            month = int(fields['month'])
+
+        offset = 0
+        tz = fields.get('tz')
+        if tz:
+            if tz[0] in '+-':
+                digits = tz[1:].replace(':', '')
+                offset = int(digits[:2]) * 60 + int(digits[2:])
+                if tz[0] == '-':
+                    offset = -offset
+            else:
+                offset = TIMEZONE_OFFSETS.get(tz.upper())
+                if offset is None:
+                    return None
+
+        try:
+            parsed = datetime(int(fields['year']), month, int(fields['day']),
+                              int(fields.get('hour') or 0), int(fields.get('minute') or 0),
+                              int(fields.get('second') or 0),
+                              tzinfo=timezone(timedelta(minutes=offset)))
+        except ValueError:
+            return None
+        return parsed.astimezone(timezone.utc)
+
+    def _to_utc(self, parsed):
+        if parsed.tzinfo is None:
+            return parsed.replace(tzinfo=timezone.utc)
+        return parsed.astimezone(timezone.utc)
@@ -0,0 +1,108 @@
+import hashlib
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from json_state import load_json, write_json
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|fbclid|gclid|mc_cid|mc_eid|at_medium|at_campaign)$',
+                             re.IGNORECASE)
+
+
+def normalize_link(link):
+    """Canonical form of an article URL for duplicate detection"""
+    parts = urlsplit(link.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    path = parts.path.rstrip('/') or '/'
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not TRACKING_PARAMS.match(key))
+    # http and https versions of a link are the same article
+    normalized = f'{host}{path}'
+    if query:
+        normalized += '?' + urlencode(query)
+    return normalized
+
+
+def entry_keys(entry):
+    """Identity keys for an entry: GUID and link, or a content hash if it has neither.
+
+    GUIDs that are not URLs are often only unique within one feed, such as
+    numeric ids, so their key is scoped to the feed's host.
+    """
+    keys = []
+    guid = (entry.guid or '').strip()
+    if guid:
+        if guid.startswith(('http://', 'https://')):
+            keys.append('link:' + normalize_link(guid))
+        else:
+            keys.append(f'guid:{urlsplit(entry.feed_url or "").netloc.lower()}:{guid}')
+    link = (entry.link or '').strip()
+    if link:
+        keys.append('link:' + normalize_link(link))
+    if not keys:
+        text = ' '.join(f"{entry.title or ''} {entry.description or ''}".lower().split())
+        keys.append('hash:' + hashlib.sha1(text.encode('utf-8')).hexdigest())
+    return keys
+
+
+class EntryDeduplicator:
+    """Drops entries already emitted in this run or, with a history file, in
+    recent runs.
+
+    The history maps entry keys to the time they were first seen and forgets
+    keys after `ttl` seconds, also in a daemon that never finishes its run.
+    """
+
+    def __init__(self, history_file=None, ttl=7 * 24 * 3600):
+        self.history_file = history_file
+        self.ttl = ttl
+        self.duplicates = 0
+        self._lock = threading.Lock()
+        # Keys first seen in this run, with that time
+        self._run_keys = {}
+        self._history = self._load()
+        self._changed = False
+
+    def _load(self):
+        if not self.history_file:
+            return {}
+        history = load_json(self.history_file)
+        expires = time.time() - self.ttl
+        return {key: seen for key, seen in history.items() if seen >= expires}
+
+    def filter(self, entries):
+        """Return the entries not seen before, remembering them as seen"""
+        unique = []
+        now = time.time()
+        with self._lock:
+            for entry in entries:
+                keys = entry_keys(entry)
+                if any(key in self._run_keys or key in self._history for key in keys):
+                    self.duplicates += 1
+                    continue
+                self._run_keys.update((key, now) for key in keys)
+                self._changed = True
+                unique.append(entry)
+        return unique
+
+    def save(self):
+        """Drop expired keys and write the history file atomically if it changed"""
+        if not self.history_file:
+            return
+        expires = time.time() - self.ttl
+        with self._lock:
+            for keys in (self._history, self._run_keys):
+                expired = [key for key, seen in keys.items() if seen < expires]
+                for key in expired:
+                    del keys[key]
+                self._changed = self._changed or bool(expired)
+            if not self._changed:
+                return
+            self._changed = False
+            history = dict(self._history)
+            history.update(self._run_keys)
+        write_json(self.history_file, history, separators=(',', ':'))
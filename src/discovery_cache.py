@@ -0,0 +1,45 @@
+import threading
+import time
+
+from json_state import load_json, write_json
+
+
+class DiscoveryCache:
+    """Persistent index of the feeds discovered for each site.
+
+    Entries expire after `ttl` seconds so homepages are only scraped again
+    once in a while, or when a cached feed stops working.
+    """
+
+    def __init__(self, index_file, ttl):
+        self.index_file = index_file
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sites = load_json(self.index_file)
+
+    def get(self, site_url):
+        """Cached feeds for a site, or None if unknown or expired"""
+        with self._lock:
+            record = self._sites.get(site_url)
+        if not record or not record.get('feeds'):
+            return None
+        if time.time() - record.get('discovered_at', 0) > self.ttl:
+            return None
+        return list(record['feeds'])
+
+    def put(self, site_url, feeds):
+        with self._lock:
+            self._sites[site_url] = {
+                'feeds': list(feeds),
+                'discovered_at': time.time(),
+            }
+
+    def invalidate(self, site_url):
+        with self._lock:
+            self._sites.pop(site_url, None)
+
+    def save(self):
+        """Write the index atomically"""
+        with self._lock:
+            sites = dict(self._sites)
+        write_json(self.index_file, sites, indent=1, sort_keys=True)
@@ -0,0 +1,133 @@
+import threading
+import time
+
+from models import ParsedFeed
+
+
+class FeedDocument:
+    """A parsed feed (a ParsedFeed) together with metadata about how it was fetched"""
+
+    __slots__ = ('url', 'feed', 'status', 'bytes', 'elapsed', 'error', 'not_modified')
+
+    def __init__(self, url, feed=None, status=None, size=0, elapsed=0.0, error=None,
+                 not_modified=False):
+        self.url = url
+        self.feed = feed
+        self.status = status
+        self.bytes = size
+        self.elapsed = elapsed
+        self.error = error
+        self.not_modified = not_modified
+
+    @property
+    def failed(self):
+        """True if the feed could not be fetched or no longer parses as a feed"""
+        if self.error or self.feed is None:
+            return True
+        if self.status is not None and self.status >= 400:
+            return True
+        return not self.feed.total and self.feed.bozo
+
+    @property
+    def entries(self):
+        if self.feed is None:
+            return []
+        return self.feed.entries
+
+    @property
+    def total(self):
+        if self.feed is None:
+            return 0
+        return self.feed.total
+
+
+class FeedCache:
+    """Fetch and parse each feed URL at most once per run.
+
+    `fetch` is a callable taking a URL and extra request headers and returning
+    (status, content, headers); `parse` takes (content, headers, url, cutoff)
+    and returns a ParsedFeed. Threads asking for a URL that is already being
+    fetched wait for that fetch instead of downloading the feed a second time.
+
+    Entries older than `cutoff` need not be parsed; asking for an earlier
+    cutoff than a cached document covers fetches the feed again.
+
+    With a `validators` store the fetch is conditional: a 304 response reuses
+    the feed parsed on a previous run.
+    """
+
+    def __init__(self, fetch, parse, validators=None, cutoff=None):
+        self._fetch = fetch
+        self._parse = parse
+        self._validators = validators
+        self.cutoff = cutoff
+        self._documents = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, cutoff=None):
+        if cutoff is None:
+            cutoff = self.cutoff
+        while True:
+            with self._lock:
+                document = self._documents.get(url)
+                if document is not None and (document.feed is None or
+                                             document.feed.covers(cutoff)):
+                    return document
+                event = self._pending.get(url)
+                owner = event is None
+                if owner:
+                    event = self._pending[url] = threading.Event()
+            if owner:
+                break
+            event.wait()
+
+        document = None
+        try:
+            document = self._load(url, cutoff)
+        finally:
+            with self._lock:
+                if document is None:
+                    document = FeedDocument(url, error='Fetch aborted')
+                self._documents[url] = document
+                del self._pending[url]
+            event.set()
+        return document
+
+    def forget(self, url):
+        """Drop a feed's document so the next get() polls it again"""
+        with self._lock:
+            self._documents.pop(url, None)
+
+    def _load(self, url, cutoff):
+        start = time.perf_counter()
+        request_headers = {}
+        if self._validators is not None and self._validators.has_payload(url):
+            request_headers = self._validators.request_headers(url)
+        try:
+            status, content, headers = self._fetch(url, request_headers)
+            if status == 304 and request_headers:
+                feed = self._validators.load_payload(url)
+                if isinstance(feed, ParsedFeed) and feed.covers(cutoff):
+                    return FeedDocument(url, feed, status, 0, time.perf_counter() - start,
+                                        not_modified=True)
+                # The stored copy is unusable; fetch the full feed again
+                self._validators.forget(url)
+                status, content, headers = self._fetch(url, {})
+            feed = self._parse(content, headers, url, cutoff)
+            if self._validators is not None and status == 200 and feed.total:
+                if self._validators.update(url, headers):
+                    self._validators.save_payload(url, feed)
+            document = FeedDocument(url, feed, status, len(content),
+                                    time.perf_counter() - start)
+        except Exception as e:
+            document = FeedDocument(url, elapsed=time.perf_counter() - start, error=str(e))
+        return document
+
+    def __contains__(self, url):
+        with self._lock:
+            return url in self._documents
+
+    def __len__(self):
+        with self._lock:
+            return len(self._documents)
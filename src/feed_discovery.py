@@ -0,0 +1,64 @@
+import codecs
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+# Same match as soup.find_all('link', type=...) in the full-page discovery
+FEED_TYPE_PATTERN = re.compile(r'application/(rss|atom)\+xml')
+
+
+class FeedLinkParser(HTMLParser):
+    """Incremental HTML scanner collecting feed <link> hrefs"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.hrefs = []
+        self.head_closed = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'link':
+            attrs = dict(attrs)
+            link_type = attrs.get('type')
+            href = attrs.get('href')
+            if link_type and href and FEED_TYPE_PATTERN.search(link_type):
+                self.hrefs.append(href)
+        elif tag == 'body':
+            self.head_closed = True
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.head_closed = True
+
+
+def scan_feed_links(chunks, base_url, encoding=None, max_bytes=512 * 1024):
+    """Find feed links in a streamed HTML document.
+
+    `chunks` is an iterable of raw bytes, such as response.iter_content().
+    Reading stops at the end of <head> once a feed link has been seen, or
+    after `max_bytes`; pages without feed links in their head are scanned
+    further so links placed in the body are still found.
+    """
+    try:
+        decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    parser = FeedLinkParser()
+    received = 0
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        received += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.head_closed and parser.hrefs:
+            break
+        if received >= max_bytes:
+            break
+    else:
+        parser.feed(decoder.decode(b'', final=True))
+        parser.close()
+
+    return {urljoin(base_url, href) for href in parser.hrefs}
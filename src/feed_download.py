@@ -0,0 +1,167 @@
+import codecs
+import logging
+import re
+import xml.parsers.expat
+
+logger = logging.getLogger('rss_finder')
+
+# Bytes at the start of a body that decide whether it is parsed as a feed
+SNIFF_BYTES = 1024
+
+# What may come before the root element: whitespace, the XML declaration and
+# other processing instructions, comments and a doctype
+PROLOG_PATTERN = re.compile(
+    rb'(?:\s+|<\?.*?\?>|<!--.*?-->|<!DOCTYPE[^>\[]*(?:\[.*?\])?\s*>)*', re.S | re.I)
+ROOT_PATTERN = re.compile(rb'<([A-Za-z_][\w.:-]*)')
+FEED_ROOTS = (b'rss', b'feed', b'rdf')
+ITEM_ELEMENTS = ('item', 'entry')
+FEED_CONTAINERS = ('rss', 'channel', 'feed', 'RDF')
+ITEM_END_PATTERN = re.compile(rb'</(?:[\w.-]+:)?(?:item|entry)\s*>')
+
+
+class NotAFeed(ValueError):
+    """The body is not an RSS, Atom or RDF document"""
+
+
+def looks_like_feed(head):
+    """False if the start of a body is clearly not an RSS, Atom or RDF feed.
+
+    Stricter than finding an <rss>, <feed> or <channel> tag anywhere: the
+    first element must be a feed root, so HTML pages that merely link to a
+    feed are refused. A prolog running past the end of `head` passes.
+    """
+    if isinstance(head, str):
+        head = head.encode('utf-8', 'replace')
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        head = head.decode('utf-16', 'ignore').encode('utf-8')
+    elif b'\x00' in head[:4]:
+        # UTF-16 or UTF-32 without a byte order mark; leave it to feedparser
+        return True
+    if head.startswith(codecs.BOM_UTF8):
+        head = head[len(codecs.BOM_UTF8):]
+    position = PROLOG_PATTERN.match(head).end()
+    root = ROOT_PATTERN.match(head, position)
+    if root is None:
+        return head[position:position + 2] in (b'', b'<!', b'<?')
+    return root.group(1).rsplit(b':', 1)[-1].lower() in FEED_ROOTS
+
+
+class ItemBoundary:
+    """Incrementally finds where the items or Atom entries of a feed end.
+
+    expat reads the bytes as Latin-1, so offsets stay exact for any
+    ASCII-compatible encoding. With `max_items` the boundary stays after
+    that many items. Feeds are often not well-formed, e.g. with a bare &;
+    after the first error, item end tags are found by a plain scan instead.
+    """
+
+    def __init__(self, max_items=0):
+        self.max_items = max_items
+        self.items = 0
+        self.end = None
+        self.closing = b''
+        self.failed = False
+        self._fed = 0
+        self._scan_from = 0
+        self._open = []
+        self._parser = xml.parsers.expat.ParserCreate(encoding='iso-8859-1')
+        # Undefined entities such as &nbsp; are common in feeds; with a
+        # foreign DTD expat skips them instead of failing
+        self._parser.UseForeignDTD(True)
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+
+    @property
+    def done(self):
+        return bool(self.max_items) and self.items >= self.max_items
+
+    def update(self, received):
+        """Track the items in `received`, the whole body read so far"""
+        if self.done:
+            return
+        if not self.failed:
+            try:
+                self._parser.Parse(bytes(received[self._fed:]), False)
+            except xml.parsers.expat.ExpatError as e:
+                self._fall_back(received, e)
+            self._fed = len(received)
+        if self.failed:
+            self._scan(received)
+
+    def _fall_back(self, received, error):
+        logger.debug("Feed is not well-formed (%s), scanning for item end tags", error)
+        self.failed = True
+        if self.end is None:
+            # The error may be inside e.g. the channel <title>; only the feed's
+            # containers are still open where the items end
+            parents = [element for element in self._open
+                       if element.rsplit(':', 1)[-1] in FEED_CONTAINERS]
+            self.closing = ''.join(f'</{element}>'
+                                   for element in reversed(parents)).encode('latin-1')
+        else:
+            self._scan_from = received.find(b'>', self.end) + 1
+
+    def _scan(self, received):
+        for match in ITEM_END_PATTERN.finditer(received, self._scan_from):
+            self.items += 1
+            self.end = match.start()
+            self._scan_from = match.end()
+            if self.done:
+                return
+
+    def _start(self, name, attrs):
+        self._open.append(name)
+
+    def _end(self, name):
+        self._open.pop()
+        if self.done or name.rsplit(':', 1)[-1] not in ITEM_ELEMENTS:
+            return
+        self.items += 1
+        # Offset of the item's end tag; the enclosing elements get closed
+        self.end = self._parser.CurrentByteIndex
+        self.closing = ''.join(f'</{element}>'
+                               for element in reversed(self._open)).encode('latin-1')
+
+    def truncate(self, content):
+        """`content` cut after the last complete item, its parents closed"""
+        cut = content.find(b'>', self.end) + 1
+        return content[:cut] + self.closing
+
+
+def read_feed_body(chunks, max_bytes=0, max_items=0):
+    """Read a streamed feed body with bounded memory.
+
+    `chunks` is an iterable of decoded body bytes, such as
+    response.iter_content(). NotAFeed is raised as soon as the first
+    SNIFF_BYTES fail looks_like_feed(). With `max_items`, reading stops
+    once that many items are complete. Beyond `max_bytes` the body is cut
+    after its last complete item, or at `max_bytes` if there is none, which
+    feedparser still reads leniently. Returns (content, truncated).
+    """
+    received = bytearray()
+    sniffed = False
+    boundary = ItemBoundary(max_items) if max_items else None
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        received += chunk
+        if not sniffed and len(received) >= SNIFF_BYTES:
+            if not looks_like_feed(bytes(received[:SNIFF_BYTES])):
+                raise NotAFeed("Response is not an RSS or Atom feed")
+            sniffed = True
+        if boundary is not None:
+            boundary.update(received)
+            if boundary.done:
+                return boundary.truncate(bytes(received)), True
+        if max_bytes and len(received) > max_bytes:
+            if boundary is None:
+                boundary = ItemBoundary()
+                boundary.update(received)
+            if boundary.end is None:
+                return bytes(received[:max_bytes]), True
+            return boundary.truncate(bytes(received)), True
+
+    if not sniffed and not looks_like_feed(bytes(received)):
+        raise NotAFeed("Response is not an RSS or Atom feed")
+    return bytes(received), False
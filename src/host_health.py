@@ -0,0 +1,76 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from json_state import load_json, write_json
+
+
+class HostUnavailable(requests.exceptions.RequestException):
+    """Raised instead of making a request to a host whose circuit is open"""
+
+
+def host_of(url):
+    return urlparse(url).netloc.lower()
+
+
+class HostHealth:
+    """Persistent per-host failure record with a circuit breaker.
+
+    After `threshold` consecutive failures a host's circuit opens and
+    requests to it are refused until its retry time. The wait starts at
+    `base_delay` seconds and doubles with every further failure, up to
+    `max_delay`. Once the retry time passes, requests go through again;
+    one success closes the circuit. A `threshold` of 0 disables the breaker
+    but still keeps the record.
+    """
+
+    def __init__(self, health_file, threshold=3, base_delay=3600, max_delay=7 * 24 * 3600):
+        self.health_file = health_file
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._hosts = load_json(self.health_file)
+
+    def check(self, url):
+        """Raise HostUnavailable if requests to the URL's host are suspended"""
+        host = host_of(url)
+        with self._lock:
+            record = self._hosts.get(host)
+            if not record or not self.threshold or record.get('retry_at', 0) <= time.time():
+                return
+            self.skipped += 1
+        raise HostUnavailable(
+            f"{host} skipped after {record['failures']} consecutive failures "
+            f"(last: {record['last_error']}); retrying after "
+            f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(record['retry_at']))}")
+
+    def record_success(self, url):
+        with self._lock:
+            self._hosts.pop(host_of(url), None)
+
+    def record_failure(self, url, error):
+        """Count one failed request; urllib3's retries within it do not add up"""
+        now = time.time()
+        with self._lock:
+            record = self._hosts.setdefault(host_of(url), {'failures': 0})
+            record['failures'] += 1
+            record['last_error'] = str(error)[:300]
+            record['last_failure'] = now
+            if self.threshold and record['failures'] >= self.threshold:
+                delay = self.base_delay * 2 ** (record['failures'] - self.threshold)
+                record['retry_at'] = now + min(self.max_delay, delay)
+
+    def get(self, url):
+        """The health record of the URL's host, empty if it is healthy"""
+        with self._lock:
+            return dict(self._hosts.get(host_of(url), {}))
+
+    def save(self):
+        """Write the record atomically"""
+        with self._lock:
+            hosts = {host: dict(record) for host, record in self._hosts.items()}
+        write_json(self.health_file, hosts, indent=1, sort_keys=True)
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import pickle
+import threading
+from datetime import datetime
+
+from json_state import load_json, write_json
+
+
+class ValidatorStore:
+    """On-disk store of HTTP validators (ETag / Last-Modified) between runs.
+
+    Validators live in `validators.json`; the parsed document that goes with
+    them is pickled under `payloads/` so a 304 response can be answered
+    without downloading or parsing anything.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.index_file = os.path.join(cache_dir, 'validators.json')
+        self.payload_dir = os.path.join(cache_dir, 'payloads')
+        self._lock = threading.Lock()
+        self._records = load_json(self.index_file)
+
+    def _payload_path(self, url):
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.payload_dir, f'{digest}.pickle')
+
+    def get(self, url):
+        with self._lock:
+            return dict(self._records.get(url, {}))
+
+    def request_headers(self, url):
+        """Conditional request headers for a URL, empty if nothing is stored"""
+        record = self.get(url)
+        headers = {}
+        if record.get('etag'):
+            headers['If-None-Match'] = record['etag']
+        if record.get('last_modified'):
+            headers['If-Modified-Since'] = record['last_modified']
+        return headers
+
+    def update(self, url, response_headers, **extra):
+        """Remember the validators from a response; returns False if it had none"""
+        etag = response_headers.get('etag')
+        last_modified = response_headers.get('last-modified')
+        with self._lock:
+            if not etag and not last_modified:
+                self._records.pop(url, None)
+                return False
+            record = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'saved_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            record.update(extra)
+            self._records[url] = record
+        return True
+
+    def forget(self, url):
+        with self._lock:
+            self._records.pop(url, None)
+
+    def save_payload(self, url, payload):
+        os.makedirs(self.payload_dir, exist_ok=True)
+        path = self._payload_path(url)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            return True
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    def load_payload(self, url):
+        try:
+            with open(self._payload_path(url), 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def has_payload(self, url):
+        return os.path.exists(self._payload_path(url))
+
+    def save(self):
+        """Write the validator index atomically"""
+        with self._lock:
+            records = dict(self._records)
+        write_json(self.index_file, records, indent=1, sort_keys=True)
@@ -0,0 +1,93 @@
+import socket
+import threading
+import time
+
+import requests
+import urllib3.util.connection
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# urllib3 only decodes brotli when one of these packages is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# DNS and connect times of the last connection each thread opened
+_connection_timings = threading.local()
+_create_connection = urllib3.util.connection.create_connection
+
+
+def create_session(headers, pool_connections=10, pool_maxsize=2, retries=2,
+                   backoff_factor=0.5):
+    """Build a keep-alive session with connection pooling and retry/backoff.
+
+    `pool_connections` is the number of hosts whose connections are kept
+    open, `pool_maxsize` the number of connections kept per host. Read
+    timeouts are not retried: a host that accepts connections but does not
+    answer would otherwise hold a worker for several read timeouts.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(headers)
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+    return session
+
+
+def _timed_create_connection(address, *args, **kwargs):
+    """urllib3's create_connection with the DNS lookup timed separately"""
+    host, port = address
+    start = time.perf_counter()
+    addresses = socket.getaddrinfo(host.strip('[]'), port,
+                                   urllib3.util.connection.allowed_gai_family(),
+                                   socket.SOCK_STREAM)
+    resolved = time.perf_counter()
+    error = None
+    for _, _, _, _, sockaddr in addresses:
+        try:
+            sock = _create_connection((sockaddr[0], port), *args, **kwargs)
+        except OSError as e:
+            error = e
+            continue
+        _connection_timings.dns = resolved - start
+        _connection_timings.connect = time.perf_counter() - resolved
+        return sock
+    raise error or OSError("getaddrinfo returns an empty list")
+
+
+def instrument_connections():
+    """Record DNS and connect times of every new connection urllib3 opens"""
+    urllib3.util.connection.create_connection = _timed_create_connection
+
+
+def pop_connection_timings():
+    """(dns, connect) seconds of the current thread's newest connection, then reset.
+
+    Both are None when requests since the last call reused pooled connections.
+    """
+    timings = (getattr(_connection_timings, 'dns', None),
+               getattr(_connection_timings, 'connect', None))
+    _connection_timings.dns = _connection_timings.connect = None
+    return timings
@@ -0,0 +1,37 @@
+import json
+import os
+import socket
+import threading
+
+
+def load_json(path, default=None):
+    """The JSON document in `path`, or `default` (an empty dict) if it is
+    missing or unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {} if default is None else default
+
+
+def write_json(path, data, **dump_options):
+    """Write `data` as JSON atomically.
+
+    The temporary file is named after the host, process and thread, so a
+    cron run and the daemon sharing a cache directory, or shard workers on
+    other machines, never write to the same one. Readers never see half a
+    file. Pass a snapshot of shared state; it is serialized before writing.
+    """
+    text = json.dumps(data, **dump_options)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
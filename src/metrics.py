@@ -0,0 +1,231 @@
+import cProfile
+import csv
+import json
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+CSV_FIELDS = ('site', 'kind', 'url', 'status', 'not_modified', 'bytes', 'dns', 'connect',
+              'ttfb', 'download', 'parse', 'normalize', 'render', 'entries_total',
+              'entries_new', 'error')
+
+
+class RequestTiming:
+    """Timings of one HTTP request; the caller fills in download and bytes"""
+
+    __slots__ = ('url', 'kind', 'status', 'dns', 'connect', 'ttfb', 'download', 'bytes', 'error')
+
+    def __init__(self, url, kind):
+        self.url = url
+        self.kind = kind
+        self.status = None
+        self.dns = None
+        self.connect = None
+        self.ttfb = None
+        self.download = None
+        self.bytes = 0
+        self.error = None
+
+
+class Metrics:
+    """Collects request, parse and render timings of a run.
+
+    Requests are recorded by the fetching threads as they happen; parse
+    and normalize times come with each ParsedFeed. summary() puts them
+    together per site and feed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = []
+        self.stages = {}
+        self.renders = {}
+
+    def start_request(self, url, kind):
+        timing = RequestTiming(url, kind)
+        with self._lock:
+            self._requests.append(timing)
+        return timing
+
+    @contextmanager
+    def stage(self, name):
+        """Add the time spent in the block to a run stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0) + time.perf_counter() - start
+
+    def clear_requests(self):
+        """Drop the recorded request timings, e.g. after each daemon poll batch"""
+        with self._lock:
+            self._requests = []
+
+    def record_render(self, section, seconds):
+        with self._lock:
+            self.renders[section] = self.renders.get(section, 0) + seconds
+
+    def _requests_by_url(self):
+        by_url = {}
+        with self._lock:
+            for timing in self._requests:
+                by_url.setdefault((timing.kind, timing.url), []).append(timing)
+        return by_url
+
+    @staticmethod
+    def _combine(timings):
+        """Sum the timings of all requests made for one URL"""
+        combined = {'requests': len(timings), 'bytes': 0}
+        for field in ('dns', 'connect', 'ttfb', 'download'):
+            values = [getattr(timing, field) for timing in timings
+                      if getattr(timing, field) is not None]
+            combined[field] = sum(values) if values else None
+        for timing in timings:
+            combined['bytes'] += timing.bytes
+            combined['status'] = timing.status
+            combined['error'] = timing.error
+        return combined
+
+    def summary(self, results, feed_cache, domain_of):
+        """Per-site and per-feed metrics for the SiteResults of a run"""
+        by_url = self._requests_by_url()
+        sites = []
+        for result in results:
+            homepage = by_url.get(('homepage', result.url))
+            site = {
+                'url': result.url,
+                'domain': domain_of(result.url),
+                'error': result.error,
+                'entries_new': len(result.entries),
+                'homepage': self._combine(homepage) if homepage else None,
+                'feeds': [],
+            }
+            for feed_url in result.feeds:
+                document = feed_cache.get(feed_url)
+                feed = self._combine(by_url.get(('feed', feed_url), []))
+                parsed = document.feed
+                feed.update({
+                    'url': feed_url,
+                    'status': document.status,
+                    'not_modified': document.not_modified,
+                    'parse': None if document.not_modified or parsed is None
+                    else parsed.parse_seconds,
+                    'normalize': None if document.not_modified or parsed is None
+                    else parsed.normalize_seconds,
+                    'entries_total': document.total,
+                    'entries_new': sum(1 for entry in result.entries
+                                       if entry.feed_url == feed_url),
+                    'error': document.error,
+                })
+                site['feeds'].append(feed)
+            sites.append(site)
+        with self._lock:
+            return {'stages': dict(self.stages), 'render': dict(self.renders), 'sites': sites}
+
+    def write_json(self, path, summary):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=1)
+
+    def write_csv(self, path, summary):
+        """One row per site, homepage request and feed"""
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for site in summary['sites']:
+                writer.writerow({'site': site['url'], 'kind': 'site', 'url': site['url'],
+                                 'render': summary['render'].get(site['domain']),
+                                 'entries_new': site['entries_new'], 'error': site['error']})
+                if site['homepage']:
+                    writer.writerow(dict(site['homepage'], site=site['url'], kind='homepage',
+                                         url=site['url']))
+                for feed in site['feeds']:
+                    writer.writerow(dict(feed, site=site['url'], kind='feed'))
+
+    def write_prometheus(self, path, summary):
+        """Metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            for labels, value in samples:
+                if value is None:
+                    continue
+                label_text = ','.join(f'{key}="{_escape_label(value_)}"'
+                                      for key, value_ in labels.items())
+                lines.append(f'{name}{{{label_text}}} {value}')
+
+        metric('rss_stage_seconds', 'Wall-clock time spent in each stage of the run',
+               [({'stage': stage}, seconds) for stage, seconds in summary['stages'].items()])
+        requests = []
+        for site in summary['sites']:
+            if site['homepage']:
+                requests.append((site['url'], 'homepage', site['url'], site['homepage']))
+            requests.extend((site['url'], 'feed', feed['url'], feed) for feed in site['feeds'])
+        metric('rss_request_seconds', 'Time per request phase for homepages and feeds',
+               [({'site': site, 'kind': kind, 'url': url, 'phase': phase}, timing[phase])
+                for site, kind, url, timing in requests
+                for phase in ('dns', 'connect', 'ttfb', 'download')])
+        metric('rss_request_bytes', 'Bytes received for homepages and feeds',
+               [({'site': site, 'kind': kind, 'url': url}, timing['bytes'])
+                for site, kind, url, timing in requests])
+        feeds = [(site['url'], feed) for site in summary['sites'] for feed in site['feeds']]
+        metric('rss_feed_parse_seconds', 'Time spent in feedparser per feed',
+               [({'site': site, 'feed': feed['url']}, feed['parse']) for site, feed in feeds])
+        metric('rss_feed_normalize_seconds', 'Time spent normalizing entries per feed',
+               [({'site': site, 'feed': feed['url']}, feed['normalize'])
+                for site, feed in feeds])
+        metric('rss_feed_entries', 'Entries per feed, in total and new in this run',
+               [({'site': site, 'feed': feed['url'], 'state': state}, feed[f'entries_{state}'])
+                for site, feed in feeds for state in ('total', 'new')])
+        metric('rss_render_seconds', 'PDF layout time per site section',
+               [({'section': section}, seconds)
+                for section, seconds in summary['render'].items()])
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class ThreadProfiler:
+    """cProfile for the main thread and every worker thread started with it.
+
+    Pass `start_thread` as a thread pool initializer; `run` profiles the
+    main thread, and `dump` merges all profiles into one pstats file. From
+    Python 3.12 cProfile is built on sys.monitoring: only one profiler can
+    be active, and the one started by `run` already sees every thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles = []
+
+    def start_thread(self):
+        if sys.version_info >= (3, 12):
+            return
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def run(self, func, *args, **kwargs):
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.insert(0, profile)
+        return profile.runcall(func, *args, **kwargs)
+
+    def dump(self, path):
+        with self._lock:
+            profiles = list(self._profiles)
+        # Threads that never ran anything have no stats, which pstats rejects
+        for profile in profiles:
+            profile.create_stats()
+        profiles = [profile for profile in profiles if profile.stats]
+        stats = pstats.Stats(*profiles)
+        stats.dump_stats(path)
+        return stats
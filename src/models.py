@@ -0,0 +1,66 @@
+class Entry:
+    """A normalized feed entry as collected in a run"""
+
+    __slots__ = ('title', 'link', 'published', 'description', 'guid', 'feed_url')
+
+    def __init__(self, title, link, published, description, guid='', feed_url=''):
+        self.title = title
+        self.link = link
+        self.published = published
+        self.description = description
+        self.guid = guid
+        self.feed_url = feed_url
+
+    @property
+    def published_text(self):
+        return self.published.strftime('%Y-%m-%d %H:%M:%S UTC')
+
+    def __repr__(self):
+        return f'Entry({self.title!r}, {self.link!r})'
+
+
+class SiteResult:
+    """Outcome of processing one website"""
+
+    __slots__ = ('url', 'feeds', 'entries', 'output_file', 'error')
+
+    def __init__(self, url, feeds=None, entries=None, output_file=None, error=None):
+        self.url = url
+        self.feeds = feeds or []
+        self.entries = entries or []
+        self.output_file = output_file
+        self.error = error
+
+
+class ParsedFeed:
+    """Plain-data result of parsing a feed, small enough to pass between processes.
+
+    `entries` holds the normalized entries published at or after `cutoff`
+    (all of them if `cutoff` is None); `total` counts every entry in the feed.
+    `poll_hint` is the publisher's requested polling interval and
+    `publish_interval` the average gap between recent entries, both in
+    seconds or None. `parse_seconds` and `normalize_seconds` time the
+    feedparser and entry normalization steps.
+    """
+
+    __slots__ = ('entries', 'total', 'latest_published', 'bozo', 'cutoff', 'poll_hint',
+                 'publish_interval', 'parse_seconds', 'normalize_seconds')
+
+    def __init__(self, entries, total, latest_published=None, bozo=False, cutoff=None,
+                 poll_hint=None, publish_interval=None, parse_seconds=None,
+                 normalize_seconds=None):
+        self.entries = entries
+        self.total = total
+        self.latest_published = latest_published
+        self.bozo = bozo
+        self.cutoff = cutoff
+        self.poll_hint = poll_hint
+        self.publish_interval = publish_interval
+        self.parse_seconds = parse_seconds
+        self.normalize_seconds = normalize_seconds
+
+    def covers(self, cutoff):
+        """True if every entry newer than `cutoff` was normalized"""
+        if self.cutoff is None:
+            return True
+        return cutoff is not None and cutoff >= self.cutoff
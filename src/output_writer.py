@@ -0,0 +1,99 @@
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+
+# zstd compression of the JSONL export needs the zstandard package
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger('rss_finder')
+
+OUTPUT_FORMATS = ('text', 'jsonl', 'both')
+COMPRESSIONS = ('gzip', 'zstd', 'none')
+SUFFIXES = {'gzip': '.gz', 'zstd': '.zst', 'none': ''}
+
+
+def available_compression(compression):
+    """The compression to use for `compression`, falling back to gzip without zstandard"""
+    if compression == 'zstd' and zstandard is None:
+        logger.warning("zstd compression needs the zstandard package, using gzip instead")
+        return 'gzip'
+    return compression
+
+
+def entry_record(entry, domain):
+    """One JSONL line for an entry"""
+    return json.dumps({
+        'domain': domain,
+        'feed': entry.feed_url,
+        'title': entry.title,
+        'link': entry.link,
+        'guid': entry.guid,
+        'published': entry.published.isoformat(),
+        'description': entry.description,
+    }, ensure_ascii=False) + '\n'
+
+
+class OutputWriter:
+    """Writes output files from a single background thread.
+
+    Renderers queue each file whole, as a list of text chunks. The writer
+    joins and encodes them, writes them to a temporary file in one call and
+    renames it into place, so no reader sees a half-written file. The queue
+    is bounded, so rendering waits when the disk falls behind.
+    """
+
+    def __init__(self, max_pending=64):
+        self._queue = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._run, name='output-writer', daemon=True)
+        self.files = 0
+        self.bytes = 0
+        self.failed = 0
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, path, chunks, compression='none'):
+        self._queue.put((path, chunks, compression))
+
+    def close(self):
+        """Wait until every queued file has been written"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            path, chunks, compression = job
+            try:
+                self.bytes += self._write(path, chunks, compression)
+                self.files += 1
+            except Exception as e:
+                # Any error, e.g. zstandard.ZstdError, must not end the thread:
+                # write() would then block forever on the full queue
+                self.failed += 1
+                logger.error("Error writing %s: %s", path, e)
+
+    def _write(self, path, chunks, compression):
+        data = ''.join(chunks).encode('utf-8')
+        if compression == 'gzip':
+            data = gzip.compress(data, compresslevel=6)
+        elif compression == 'zstd':
+            data = zstandard.ZstdCompressor().compress(data)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data)
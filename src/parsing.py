@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from urllib.parse import urljoin
+
+from date_parser import DateParser
+from feed_discovery import FEED_TYPE_PATTERN
+from models import Entry, ParsedFeed
+
+logger = logging.getLogger('rss_finder')
+
+# Below DEBUG: per-entry raw dumps, far too large for normal debugging
+DEBUG_RAW = 5
+logging.addLevelName(DEBUG_RAW, 'RAW')
+
+# Consecutive entries older than the cutoff that end a newest-first feed
+STOP_AFTER_OLD_ENTRIES = 3
+
+# One per process; remembers which date format each feed uses
+_date_parser = DateParser()
+
+# Length of the sy:updatePeriod values in seconds
+UPDATE_PERIODS = {
+    'hourly': 3600,
+    'daily': 24 * 3600,
+    'weekly': 7 * 24 * 3600,
+    'monthly': 30 * 24 * 3600,
+    'yearly': 365 * 24 * 3600,
+}
+
+
+class _RawEntry:
+    """Formats a feed entry's key/value dump only if the record is emitted"""
+
+    __slots__ = ('entry',)
+
+    def __init__(self, entry):
+        self.entry = entry
+
+    def __str__(self):
+        return '\n'.join(f"{key}: {value}" for key, value in self.entry.items())
+
+
+def entry_content(entry):
+    """Full content of an entry using multiple fallback options"""
+    content = ''
+    # Try to get the full content first
+    if hasattr(entry, 'content'):
+        content = entry.content[0].get('value', '')
+    # If no content, try the full article text
+    if not content and hasattr(entry, 'article_text'):
+        content = entry.article_text
+    # Try summary next
+    if not content and hasattr(entry, 'summary_detail'):
+        content = entry.summary_detail.get('value', '')
+    # Fall back to regular summary
+    if not content and hasattr(entry, 'summary'):
+        content = entry.summary
+    # Last resort: description
+    if not content:
+        content = entry.get('description', 'No content available')
+    return content
+
+
+def feed_poll_hint(info):
+    """Polling interval in seconds a feed asks for via <ttl> or sy:updatePeriod"""
+    hints = []
+    try:
+        if info.get('ttl'):
+            hints.append(int(info['ttl']) * 60)
+    except ValueError:
+        pass
+    period = UPDATE_PERIODS.get(str(info.get('sy_updateperiod', '')).strip().lower())
+    if period:
+        try:
+            frequency = max(1, int(info.get('sy_updatefrequency') or 1))
+        except ValueError:
+            frequency = 1
+        hints.append(period // frequency)
+    return max(hints) if hints else None
+
+
+def publish_interval(dates):
+    """Average seconds between entries, from the publication dates seen"""
+    if len(dates) < 2:
+        return None
+    span = (max(dates) - min(dates)).total_seconds()
+    return span / (len(dates) - 1) if span > 0 else None
+
+
+def parse_feed(content, headers, feed_url, cutoff=None):
+    """Parse raw feed bytes into a ParsedFeed of normalized entries.
+
+    Only entries published at or after `cutoff` are normalized; feeds that
+    are sorted newest-first stop at the first run of older entries. Runs in
+    a worker process, so everything returned is plain picklable data.
+    """
+    import feedparser  # deferred: slow to import and unused by report and pdf
+
+    start = time.perf_counter()
+    feed = feedparser.parse(content, response_headers=headers)
+    parsed_at = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    dump_entries = logger.isEnabledFor(DEBUG_RAW)
+
+    entries = []
+    dates = []
+    previous_date = None
+    newest_first = True
+    old_in_a_row = 0
+
+    for entry in feed.entries:
+        try:
+            # Raw entry data only at the most verbose level; skipped entirely otherwise
+            if dump_entries:
+                logger.log(DEBUG_RAW, "Entry raw data:\n%s", _RawEntry(entry))
+
+            pub_date = _date_parser.parse_entry(entry, feed_url)
+            if pub_date:
+                dates.append(pub_date)
+
+            # If no date could be parsed, add entry anyway with current time
+            if not pub_date:
+                logger.debug("Could not parse date for entry: %s", entry.get('title'))
+                pub_date = now
+            elif cutoff is not None:
+                if previous_date is not None and pub_date > previous_date:
+                    newest_first = False
+                previous_date = pub_date
+
+                if pub_date < cutoff:
+                    old_in_a_row += 1
+                    if newest_first and old_in_a_row >= STOP_AFTER_OLD_ENTRIES:
+                        logger.debug("%s is sorted newest-first, skipping older entries",
+                                     feed_url)
+                        break
+                    continue
+                old_in_a_row = 0
+
+            entries.append(Entry(
+                title=entry.title,
+                link=entry.link,
+                published=pub_date,
+                description=entry_content(entry),  # Store full content without truncation
+                guid=entry.get('id', ''),
+                feed_url=feed_url,
+            ))
+
+        except Exception as e:
+            logger.debug("Error processing entry in %s: %s", feed_url, e)
+            continue
+
+    latest_published = feed.entries[0].get('published') if feed.entries else None
+    return ParsedFeed(entries, len(feed.entries), latest_published, bool(feed.get('bozo')),
+                      cutoff, feed_poll_hint(feed.feed), publish_interval(dates),
+                      parsed_at - start, time.perf_counter() - parsed_at)
+
+
+def extract_feed_links_html(text, url):
+    """Feed <link> URLs from a full HTML page, parsed with BeautifulSoup"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(text, 'html.parser')
+    feeds = set()
+
+    # Look for RSS/Atom feed links
+    feed_links = soup.find_all('link', type=FEED_TYPE_PATTERN)
+    for link in feed_links:
+        href = link.get('href', '')
+        if href:
+            feeds.add(urljoin(url, href))
+    return feeds
+
+
+class ParsePool:
+    """Runs CPU-bound parsing in worker processes.
+
+    With `workers` <= 1, or once the pool has broken, calls run inline in
+    the calling thread instead. The processes are started on the first call.
+    """
+
+    def __init__(self, workers=0):
+        self.workers = workers
+        self._executor = None
+        self._broken = False
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self.workers <= 1 or self._broken:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def run(self, func, *args):
+        executor = self._get_executor()
+        if executor is not None:
+            try:
+                return executor.submit(func, *args).result()
+            except BrokenProcessPool:
+                logger.warning("Parse worker pool failed, parsing in-process from now on")
+                self._broken = True
+                executor.shutdown(wait=False, cancel_futures=True)
+        return func(*args)
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
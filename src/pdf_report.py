@@ -0,0 +1,324 @@
+import html
+import logging
+import os
+import shutil
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Flowable
+
+# Merging per-site PDFs rendered in worker processes needs pypdf
+try:
+    from pypdf import PdfWriter
+except ImportError:
+    PdfWriter = None
+
+logger = logging.getLogger('rss_finder')
+
+DEFAULT_DESCRIPTION_CHARS = 1500
+
+
+def build_styles():
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            spaceAfter=30
+        ),
+        'heading': ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceAfter=20
+        ),
+        'normal': ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=10,
+            spaceAfter=12
+        ),
+        'date': ParagraphStyle(
+            'CustomDate',
+            parent=styles['Italic'],
+            fontSize=8,
+            textColor=colors.gray
+        ),
+    }
+
+
+def pdf_escape(text):
+    """Escape text for use inside reportlab Paragraph markup"""
+    return html.escape(text or '', quote=True)
+
+
+class _DescriptionSanitizer(HTMLParser):
+    """Reduces feed HTML to the inline markup reportlab's Paragraph accepts"""
+
+    INLINE_TAGS = {'b': 'b', 'strong': 'b', 'i': 'i', 'em': 'i', 'u': 'u'}
+    BREAK_TAGS = {'br', 'p', 'div', 'li', 'tr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote'}
+    SKIP_TAGS = {'script', 'style', 'noscript', 'iframe', 'svg'}
+
+    def __init__(self, max_chars):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.length = 0
+        self.parts = []
+        self.open_tags = []
+        self.skip_depth = 0
+        self.truncated = False
+        self.pending_break = False
+        self.space_pending = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.truncated:
+            return
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in self.INLINE_TAGS:
+            self.parts.append(f'<{self.INLINE_TAGS[tag]}>')
+            self.open_tags.append(self.INLINE_TAGS[tag])
+        elif tag in self.BREAK_TAGS:
+            self.pending_break = self.length > 0
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in self.BREAK_TAGS and not self.truncated:
+            self.pending_break = self.length > 0
+
+    def handle_endtag(self, tag):
+        if self.truncated:
+            return
+        if tag in self.SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in self.INLINE_TAGS:
+            name = self.INLINE_TAGS[tag]
+            if name in self.open_tags:
+                # Close everything opened inside it too, keeping the markup balanced
+                while self.open_tags:
+                    open_tag = self.open_tags.pop()
+                    self.parts.append(f'</{open_tag}>')
+                    if open_tag == name:
+                        break
+        elif tag in self.BREAK_TAGS:
+            self.pending_break = self.length > 0
+
+    def handle_data(self, data):
+        if self.truncated or self.skip_depth:
+            return
+        text = ' '.join(data.split())
+        if not text:
+            self.space_pending = self.length > 0 or self.space_pending
+            return
+        if self.pending_break:
+            self.parts.append('<br/>')
+            self.pending_break = False
+        elif self.length and (self.space_pending or data[:1].isspace()):
+            text = ' ' + text
+        self.space_pending = data[-1:].isspace()
+        remaining = self.max_chars - self.length
+        if len(text) > remaining:
+            text = text[:remaining].rsplit(' ', 1)[0] + '…'
+            self.truncated = True
+        self.parts.append(html.escape(text, quote=False))
+        self.length += len(text)
+
+    def markup(self):
+        closing = ''.join(f'</{tag}>' for tag in reversed(self.open_tags))
+        return ''.join(self.parts).strip() + closing
+
+
+def sanitize_description(markup, max_chars=DEFAULT_DESCRIPTION_CHARS):
+    """Paragraph-safe markup for a description, truncated to `max_chars` of text"""
+    sanitizer = _DescriptionSanitizer(max_chars)
+    try:
+        sanitizer.feed(markup or '')
+        sanitizer.close()
+    except Exception:
+        return pdf_escape(' '.join(html.unescape(markup or '').split())[:max_chars])
+    return sanitizer.markup()
+
+
+class SectionMarker(Flowable):
+    """Invisible flowable recording when layout reaches the start of a section"""
+
+    def __init__(self, name, timings):
+        super().__init__()
+        self.name = name
+        self.timings = timings
+
+    def wrap(self, available_width, available_height):
+        if self.name not in self.timings:
+            self.timings[self.name] = time.perf_counter()
+        return 0, 0
+
+    def draw(self):
+        pass
+
+
+class ChunkedStory(list):
+    """Flowable list refilled from a generator while reportlab consumes it.
+
+    BaseDocTemplate.build() takes flowables off the front of the list and
+    checks len() before each one, so topping the list up there keeps only
+    about `chunk_size` flowables in memory instead of the whole report.
+    """
+
+    def __init__(self, flowables, chunk_size=500):
+        super().__init__()
+        self._source = iter(flowables)
+        self._chunk_size = chunk_size
+        self._exhausted = False
+
+    def __len__(self):
+        if not self._exhausted and list.__len__(self) < self._chunk_size:
+            self._refill()
+        return list.__len__(self)
+
+    def _refill(self):
+        for flowable in self._source:
+            self.append(flowable)
+            if list.__len__(self) >= 2 * self._chunk_size:
+                return
+        self._exhausted = True
+
+
+def section_flowables(domain, entries, styles, max_chars):
+    """Flowables for one site's section, generated lazily"""
+    yield Paragraph(f"Source: {pdf_escape(domain)}", styles['heading'])
+    yield Spacer(1, 12)
+
+    for entry in entries:
+        yield Paragraph(pdf_escape(entry.title), styles['heading'])
+        yield Paragraph(f"Published: {entry.published_text}", styles['date'])
+        link = pdf_escape(entry.link)
+        yield Paragraph(f'<link href="{link}">{link}</link>', styles['normal'])
+        description = sanitize_description(entry.description, max_chars)
+        if description:
+            yield Paragraph(description, styles['normal'])
+        yield Spacer(1, 20)
+
+    # Add page break between sites
+    yield PageBreak()
+
+
+def report_flowables(title, sections, styles, max_chars, timings=None):
+    yield Paragraph(pdf_escape(title), styles['title'])
+    yield Spacer(1, 12)
+    for domain, entries in sections:
+        if timings is not None:
+            yield SectionMarker(domain, timings)
+        yield from section_flowables(domain, entries, styles, max_chars)
+    if timings is not None:
+        yield SectionMarker(None, timings)
+
+
+def _new_document(pdf_file):
+    return SimpleDocTemplate(
+        pdf_file,
+        pagesize=A4,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72
+    )
+
+
+def render_pdf(pdf_file, title, sections, max_chars=DEFAULT_DESCRIPTION_CHARS, chunk_size=500):
+    """Render sections into one PDF with bounded memory.
+
+    Returns a list of (section, seconds) layout timings.
+    """
+    marks = {}
+    story = ChunkedStory(report_flowables(title, sections, build_styles(), max_chars, marks),
+                         chunk_size)
+    _new_document(pdf_file).build(story)
+
+    # Layout time of a section runs from its marker to the next one
+    names = [domain for domain, _ in sections] + [None]
+    timings = []
+    for name, next_name in zip(names, names[1:]):
+        if name in marks and next_name in marks:
+            timings.append((name, marks[next_name] - marks[name]))
+    return timings
+
+
+def _render_part(part_file, title, domain, entries, max_chars):
+    """Worker process entry point: render one site's section to its own file"""
+    start = time.perf_counter()
+    styles = build_styles()
+    flowables = []
+    if title:
+        flowables.append(Paragraph(pdf_escape(title), styles['title']))
+        flowables.append(Spacer(1, 12))
+    flowables.extend(section_flowables(domain, entries, styles, max_chars))
+    _new_document(part_file).build(flowables)
+    return domain, time.perf_counter() - start
+
+
+def render_pdf_parallel(pdf_file, title, sections, workers,
+                        max_chars=DEFAULT_DESCRIPTION_CHARS):
+    """Render each section in a worker process, then merge the parts with pypdf"""
+    part_dir = tempfile.mkdtemp(prefix='pdf_parts_', dir=os.path.dirname(pdf_file))
+    try:
+        part_files = [os.path.join(part_dir, f'part_{index:05d}.pdf')
+                      for index in range(len(sections))]
+        timings = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # A section's entries are only read when it is about to be queued,
+            # so a few sections are in memory at a time
+            pending = deque()
+            for index, (part_file, (domain, entries)) in enumerate(zip(part_files, sections)):
+                if len(pending) >= 2 * workers:
+                    timings.append(pending.popleft().result())
+                pending.append(executor.submit(_render_part, part_file,
+                                               title if index == 0 else None, domain,
+                                               list(entries), max_chars))
+            timings.extend(future.result() for future in pending)
+
+        writer = PdfWriter()
+        for part_file in part_files:
+            writer.append(part_file)
+        with open(pdf_file, 'wb') as f:
+            writer.write(f)
+        return timings
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+
+def build_pdf_report(pdf_file, title, sections, workers=0,
+                     max_chars=DEFAULT_DESCRIPTION_CHARS, chunk_size=500):
+    """Write the news PDF and log per-section timings.
+
+    `sections` is a list of (site name, entries); the entries may be a
+    lazy iterable, read only when its section is rendered. With `workers`
+    > 1 and pypdf installed, sections are rendered in parallel worker
+    processes; otherwise they are streamed into a single document in chunks.
+    """
+    start = time.perf_counter()
+    if workers > 1 and len(sections) > 1:
+        if PdfWriter is None:
+            logger.warning("pypdf is not installed; rendering the PDF in a single process")
+        else:
+            timings = render_pdf_parallel(pdf_file, title, sections, workers, max_chars)
+            _log_timings(timings, time.perf_counter() - start)
+            return timings
+
+    timings = render_pdf(pdf_file, title, sections, max_chars, chunk_size)
+    _log_timings(timings, time.perf_counter() - start)
+    return timings
+
+
+def _log_timings(timings, total):
+    for name, seconds in timings:
+        logger.debug("PDF section %s rendered in %.2fs", name, seconds)
+    if timings:
+        name, seconds = max(timings, key=lambda timing: timing[1])
+        logger.info("PDF rendered %d sections in %.2fs (slowest: %s, %.2fs)",
+                    len(timings), total, name, seconds)
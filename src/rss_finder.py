@@ -1,103 +1,300 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 import re
+import signal
 import sys
 import time
-import feedparser
-from datetime import datetime, timedelta
-import pytz
+import argparse
+import logging
+import traceback
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 import os
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.units import inch
+from feed_cache import FeedCache, FeedDocument
+from http_cache import ValidatorStore
+from discovery_cache import DiscoveryCache
+from feed_discovery import scan_feed_links
+from feed_download import SNIFF_BYTES, NotAFeed, looks_like_feed, read_feed_body
+from metrics import Metrics, ThreadProfiler
+from dedup import EntryDeduplicator
+from article_store import ArticleStore
+from models import ParsedFeed, SiteResult
+from output_writer import OutputWriter, SUFFIXES, available_compression, entry_record
+from scheduler import PollScheduler
+from sharding import DONE, FAILED, RUNNING, ShardPlan
+from parsing import DEBUG_RAW, ParsePool, extract_feed_links_html, parse_feed
+
+logger = logging.getLogger('rss_finder')
 
 class RSSFinder:
-    def __init__(self):
+    # Daemon mode: how often the site list is reread and expired discoveries redone
+    DISCOVERY_CHECK_INTERVAL = 3600
+    # Consecutive failed polls after which a site's feeds are rediscovered
+    REDISCOVER_AFTER_FAILURES = 3
+
+    def __init__(self, max_workers=8, per_host_limit=2, discovery_ttl=7 * 24 * 3600,
+                 discovery_mode='stream', discovery_max_bytes=512 * 1024, retries=2,
+                 since=timedelta(days=1), seen_ttl=7 * 24 * 3600, pdf_workers=0,
+                 pdf_description_chars=None, parse_workers=0,
+                 db_file=None, connect_timeout=5, read_timeout=15, circuit_threshold=3,
+                 project_root=None, prometheus=False, output_format='text',
+                 jsonl_compression='gzip', feed_max_bytes=5 * 1024 * 1024, feed_max_items=0,
+                 cache_dir=None, journal_mode='WAL'):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
-        # Get project root directory (one level up from src)
-        self.project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        # Only entries published within this window are collected
+        self.since = since
+        # Concurrency limits: total sites in flight and requests per host
+        self.max_workers = max(1, max_workers)
+        self.per_host_limit = max(1, per_host_limit)
+        self._host_semaphores = {}
+        self._host_lock = threading.Lock()
+        # Connection error or timeout of each host's latest request, while it lasts
+        self._unreachable = {}
+        # Separate limits for establishing a connection and for each read
+        self.timeout = (connect_timeout, read_timeout)
+        # Per-request, per-feed and per-stage timings, written next to the report
+        self.metrics = Metrics()
+        self.prometheus = prometheus
+        # Set to a metrics.ThreadProfiler to profile the worker threads too
+        self.profiler = None
+        # Get project root directory (one level up from src) unless given one
+        self.project_root = project_root or os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))
+        
+        # The session and the state kept between runs are only created when
+        # a command first uses them, so 'report' and 'pdf' never load requests
+        # or read the caches; each shard worker has its own cache directory
+        self.cache_dir = cache_dir or os.path.join(self.project_root, '.http_cache')
+        self.retries = retries
+        self.circuit_threshold = circuit_threshold
+        self.discovery_ttl = discovery_ttl
+        self.seen_ttl = seen_ttl
+        # Reentrant: creating the feed cache opens the validators
+        self._lazy_lock = threading.RLock()
+        self._session = None
+        self._validators = None
+        self._host_health = None
+        self._feed_cache = None
+        self._discovery_cache = None
+        self._deduplicator = None
+        # feedparser and BeautifulSoup work runs in worker processes when configured
+        self.parse_pool = ParsePool(parse_workers)
+        # Articles, sites, feeds and fetches of every run; the text files and
+        # PDF are rendered from it. Opened on first use.
+        self.db_file = db_file or os.path.join(self.project_root, 'rss_news.sqlite3')
+        self.journal_mode = journal_mode
+        self._store = None
+        # 'stream' scans the homepage head incrementally, 'full' parses the whole page
+        self.discovery_mode = discovery_mode
+        self.discovery_max_bytes = discovery_max_bytes
+        # Feeds are cut to whole items beyond this size, or after this many
+        # items (0 = no limit)
+        self.feed_max_bytes = feed_max_bytes
+        self.feed_max_items = feed_max_items
         
-        # Create base output directory with today's date in project root
+        # Output directory with today's date in project root, created when
+        # the first file is written
         self.today = datetime.now().strftime('%Y%m%d')
         self.base_output_dir = os.path.join(self.project_root, f'rss_outputs_{self.today}')
-        if not os.path.exists(self.base_output_dir):
-            os.makedirs(self.base_output_dir)
         
-        # Initialize merged results file
+        # PDF rendering: worker processes (0 = streamed in-process) and description
+        # cap (None keeps the renderer's default)
+        self.pdf_workers = pdf_workers
+        self.pdf_description_chars = pdf_description_chars
+        
+        # 'text' writes the site and merged text files, 'jsonl' one JSON line
+        # per article (compressed with `jsonl_compression`), 'both' does both
+        self.output_format = output_format
+        self.jsonl_compression = available_compression(jsonl_compression)
+        
+        # Results of the current run, in input order, for the renderers
+        self.results = []
+        # Output files already claimed this run, possibly not yet written
+        self._claimed_paths = set()
+        # Fetches already logged in the store this run; several sites can share a feed
+        self._stored_fetches = set()
         self.merged_file = os.path.join(self.base_output_dir, f'all_news_{self.today}.txt')
-        with open(self.merged_file, 'w', encoding='utf-8') as f:
-            f.write(f"All RSS News - {datetime.now().strftime('%Y-%m-%d')}\n")
-            f.write("=" * 80 + "\n\n")
+        self.jsonl_file = os.path.join(
+            self.base_output_dir,
+            f'all_news_{self.today}.jsonl{SUFFIXES[self.jsonl_compression]}')
+    
+    @property
+    def store(self):
+        """The article store, opened on first use"""
+        if self._store is None:
+            self._store = ArticleStore(self.db_file, journal_mode=self.journal_mode)
+        return self._store
+    
+    def _lazy(self, name, create):
+        """The attribute `name`, set to create() by the first thread that needs it"""
+        value = getattr(self, name)
+        if value is None:
+            with self._lazy_lock:
+                value = getattr(self, name)
+                if value is None:
+                    value = create()
+                    setattr(self, name, value)
+        return value
+    
+    @property
+    def session(self):
+        """One pooled keep-alive session for homepages and feeds alike"""
+        return self._lazy('_session', self._create_session)
+    
+    def _create_session(self):
+        # deferred: requests and urllib3 are slow to import and unused by report and pdf
+        from http_client import create_session, instrument_connections
+        instrument_connections()
+        return create_session(self.headers, pool_connections=max(10, self.max_workers * 2),
+                              pool_maxsize=self.per_host_limit, retries=self.retries)
+    
+    @property
+    def validators(self):
+        """ETag / Last-Modified validators persisted between runs"""
+        return self._lazy('_validators', lambda: ValidatorStore(self.cache_dir))
     
+    @property
+    def host_health(self):
+        """Consecutive failures per host; hosts that keep failing are skipped for a while"""
+        def create():
+            from host_health import HostHealth
+            return HostHealth(os.path.join(self.cache_dir, 'host_health.json'),
+                              self.circuit_threshold)
+        return self._lazy('_host_health', create)
+    
+    @property
+    def feed_cache(self):
+        """Every feed is downloaded and parsed at most once per run"""
+        return self._lazy('_feed_cache', lambda: FeedCache(
+            self.fetch_feed, self.parse_feed, self.validators,
+            cutoff=datetime.now(timezone.utc) - self.since))
+    
+    @property
+    def discovery_cache(self):
+        """Feeds discovered per site, reused until the TTL expires"""
+        return self._lazy('_discovery_cache', lambda: DiscoveryCache(
+            os.path.join(self.cache_dir, 'discovery.json'), self.discovery_ttl))
+    
+    @property
+    def deduplicator(self):
+        """Skips articles already emitted in this run or within `seen_ttl` seconds
+        in earlier runs; a TTL of 0 only deduplicates within the run"""
+        history_file = os.path.join(self.cache_dir, 'seen_entries.json')
+        return self._lazy('_deduplicator', lambda: EntryDeduplicator(
+            history_file if self.seen_ttl > 0 else None, self.seen_ttl))
+    
+    def close_session(self):
+        if self._session is not None:
+            self._session.close()
+    
+    def output_path(self, name):
+        """Path of a file in the output directory, creating the directory"""
+        os.makedirs(self.base_output_dir, exist_ok=True)
+        return os.path.join(self.base_output_dir, name)
+    
+    def get_site_domain(self, url):
+        return urlparse(url).netloc.replace('www.', '')
+
     def get_site_folder_name(self, url):
-        parsed = urlparse(url)
-        domain = parsed.netloc.replace('www.', '')
-        folder_path = os.path.join(self.base_output_dir, domain)
-        if not os.path.exists(folder_path):
-            os.makedirs(folder_path)
+        folder_path = os.path.join(self.base_output_dir, self.get_site_domain(url))
+        os.makedirs(folder_path, exist_ok=True)
         return folder_path
 
-    def append_to_merged_file(self, url, entries):
-        with open(self.merged_file, 'a', encoding='utf-8') as f:
-            f.write(f"\n\nNews from {url}\n")
-            f.write("-" * 80 + "\n")
-            if entries:
-                for entry in entries:
-                    f.write(f"\nTitle: {entry['title']}\n")
-                    f.write(f"Published: {entry['published']}\n")
-                    f.write(f"Link: {entry['link']}\n")
-                    f.write(f"Description: {entry['description'][:500]}...\n")
-                    f.write("-" * 40 + "\n")
-            else:
-                f.write("No entries found.\n")
+    def unique_path(self, folder_path, stem, suffix):
+        """Claim a new file name without clobbering one written in the same second.
+
+        Several sites can share a domain folder, and their files are only
+        written once the output writer gets to them.
+        """
+        counter = 0
+        while True:
+            name = f"{stem}{suffix}" if counter == 0 else f"{stem}_{counter}{suffix}"
+            path = os.path.join(folder_path, name)
+            if path not in self._claimed_paths and not os.path.exists(path):
+                self._claimed_paths.add(path)
+                return path
+            counter += 1
+
+    @contextmanager
+    def host_slot(self, url):
+        """Limit the number of concurrent requests made to a single host"""
+        host = urlparse(url).netloc.lower()
+        with self._host_lock:
+            semaphore = self._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_semaphores[host] = semaphore
+        with semaphore:
+            yield
 
-    def save_recent_entries_to_file(self, url, feeds):
+    def format_entry(self, entry):
+        """Text block for one entry in the site and merged files"""
+        return (f"\nTitle: {entry.title}\n"
+                f"Published: {entry.published_text}\n"
+                f"Link: {entry.link}\n"
+                f"Description: {entry.description[:500]}...\n"
+                + "-" * 40 + "\n")
+
+    def collect_entries(self, feeds):
+        """New recent entries of a site's feeds, in feed order"""
+        all_entries = []
+        for feed_url in feeds:
+            all_entries.extend(self.deduplicator.filter(self.get_recent_entries(feed_url)))
+        return all_entries
+
+    def store_result(self, result):
+        """Record a site's outcome, feeds, fetches and entries in the article store"""
+        error = result.error or (None if result.feeds else "No RSS feeds found")
+        site_id = self.store.record_site(result.url, self.get_site_domain(result.url), error)
+        for feed_url in result.feeds:
+            feed_id = self.store.record_feed(feed_url, site_id)
+            if feed_id not in self._stored_fetches:
+                self._stored_fetches.add(feed_id)
+                self.store.record_fetch(feed_id, self.feed_cache.get(feed_url))
+        self.store.add_articles(site_id, self.get_site_domain(result.url), result.entries)
+
+    def merged_section(self, url, entries):
+        """A site's part of the merged text file"""
+        lines = [f"\n\nNews from {url}\n", "-" * 80 + "\n"]
+        if entries:
+            lines.extend(self.format_entry(entry) for entry in entries)
+        else:
+            lines.append("No entries found.\n")
+        return ''.join(lines)
+
+    def write_site_file(self, writer, url, feeds, entries):
+        """Queue a site's text file and feed list; returns the text file's path"""
         folder_path = self.get_site_folder_name(url)
         timestamp = datetime.now().strftime('%H%M%S')
-        filename = os.path.join(folder_path, f"news_{self.today}_{timestamp}.txt")
+        filename = self.unique_path(folder_path, f"news_{self.today}_{timestamp}", '.txt')
         
-        all_entries = []
+        by_feed = {}
+        for entry in entries:
+            by_feed.setdefault(entry.feed_url, []).append(entry)
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(f"Recent news from {url}\n")
-            f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("=" * 80 + "\n\n")
-            
-            for feed_url in feeds:
-                f.write(f"\nFeed: {feed_url}\n")
-                f.write("-" * 80 + "\n")
-                
-                entries = self.get_recent_entries(feed_url)
-                all_entries.extend(entries)  # Collect all entries for merged file
-                
-                if entries:
-                    for entry in entries:
-                        f.write(f"\nTitle: {entry['title']}\n")
-                        f.write(f"Published: {entry['published']}\n")
-                        f.write(f"Link: {entry['link']}\n")
-                        f.write(f"Description: {entry['description'][:500]}...\n")
-                        f.write("-" * 40 + "\n")
-                else:
-                    f.write("No entries found in this feed.\n")
+        lines = [f"Recent news from {url}\n",
+                 f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+                 "=" * 80 + "\n\n"]
+        for feed_url in feeds:
+            lines.append(f"\nFeed: {feed_url}\n")
+            lines.append("-" * 80 + "\n")
+            feed_entries = by_feed.get(feed_url)
+            if feed_entries:
+                lines.extend(self.format_entry(entry) for entry in feed_entries)
+            else:
+                lines.append("No entries found in this feed.\n")
+        writer.write(filename, lines)
         
         # Save found RSS feeds to a separate file
         feeds_file = os.path.join(folder_path, f"rss_feeds_{self.today}.txt")
-        with open(feeds_file, 'w', encoding='utf-8') as f:
-            f.write(f"RSS feeds for {url}\n")
-            f.write(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("=" * 80 + "\n\n")
-            for feed in feeds:
-                f.write(f"{feed}\n")
-        
-        # Append to merged file
-        self.append_to_merged_file(url, all_entries)
+        writer.write(feeds_file, [
+            f"RSS feeds for {url}\n",
+            f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+            "=" * 80 + "\n\n",
+        ] + [f"{feed}\n" for feed in feeds])
         
         return filename
 
@@ -108,89 +305,527 @@ class RSSFinder:
             url = 'https://' + url
         return url
 
-    def process_urls_from_file(self, filename='websites.txt'):
-        # Get the absolute path to the data directory
-        current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        filename = os.path.join(current_dir, 'data', filename)
+    def read_urls(self, filename):
+        with open(filename, 'r', encoding='utf-8') as file:
+            # Clean URLs while reading and remove any trailing commas
+            return [self.clean_url(line.strip()) for line in file if line.strip() and not line.startswith('#')]
+
+    def create_example_file(self, filename):
+        logger.error("File '%s' not found", filename)
+        with open(filename, 'w', encoding='utf-8') as file:
+            file.write("www.wnp.pl\ndefence24.pl\n")
+        logger.error("Created example %s file. Please add your websites and run again.",
+                     filename)
+
+    def listed_urls(self, filename='websites.txt'):
+        """URLs listed in data/<filename>; creates an example list if it is missing"""
+        filename = os.path.join(self.project_root, 'data', filename)
+        try:
+            return self.read_urls(filename)
+        except FileNotFoundError:
+            self.create_example_file(filename)
+            return None
+
+    def process_urls_from_file(self, filename='websites.txt', urls=None, render=True):
+        """Collect new entries of every site into the article store, then write
+        the processing report, the text files and the PDF.
+
+        `urls` replaces the site list in data/<filename>. Without `render`
+        only the article store and the caches are updated.
+        """
+        if urls is None:
+            urls = self.listed_urls(filename)
+            if urls is None:
+                return
         
         try:
-            with open(filename, 'r', encoding='utf-8') as file:
-                # Clean URLs while reading and remove any trailing commas
-                urls = [self.clean_url(line.strip()) for line in file if line.strip() and not line.startswith('#')]
+            site_results, processed_sites, failed_sites = self.collect_sites(urls)
             
-            print(f"\nFound {len(urls)} websites to process")
-            processed_sites = {}
-            failed_sites = []
+            if render:
+                self.write_reports(urls, processed_sites, failed_sites)
+                self.write_outputs(self.results)
+                self.write_pdf(self.results)
+                self.write_metrics(site_results)
             
-            for index, url in enumerate(urls, 1):
-                try:
-                    print(f"\n{'='*80}")
-                    print(f"Processing website ({index}/{len(urls)}): {url}")
-                    
-                    if self.is_feed_url(url):
-                        print(f"✓ URL is a direct RSS feed")
-                        feeds = [url]
-                    else:
-                        feeds = self.find_rss_feeds(url)
-                    
-                    if feeds:
-                        print(f"✓ Found {len(feeds)} RSS feeds")
-                        output_file = self.save_recent_entries_to_file(url, feeds)
-                        print(f"✓ Saved results to: {output_file}")
-                        processed_sites[url] = feeds
-                    else:
-                        print(f"✗ No RSS feeds found for {url}")
-                        failed_sites.append((url, "No RSS feeds found"))
-                except Exception as e:
-                    print(f"✗ Error processing {url}: {str(e)}")
-                    failed_sites.append((url, str(e)))
-                    continue
-            
-            # Generate detailed report
+            self.store.close()
+            logger.info("Processing complete!")
+        
+        except Exception as e:
+            logger.exception("Error processing file: %s", e)
+
+    def collect_sites(self, urls):
+        """Process every site and record the outcomes in the article store.
+
+        Returns the SiteResults in input order, the feeds of each processed
+        site and the (url, error) of each failed one.
+        """
+        logger.info("Found %d websites to process (%d workers, max %d requests per host)",
+                    len(urls), self.max_workers, self.per_host_limit)
+        processed_sites = {}
+        failed_sites = []
+        site_results = []
+        self.store.start_run()
+        
+        # Sites are processed concurrently; results are consumed in input
+        # order so the merged file and report keep the list's ordering
+        with self.metrics.stage('fetch'), self.thread_pool() as executor:
+            for index, result in enumerate(executor.map(self.process_site, urls), 1):
+                url = result.url
+                site_results.append(result)
+                self.store_result(result)
+                if result.error:
+                    logger.warning("[%d/%d] ✗ %s: %s", index, len(urls), url, result.error)
+                    failed_sites.append((url, result.error))
+                elif result.feeds:
+                    logger.info("[%d/%d] ✓ %s: %d feeds, %d entries", index, len(urls),
+                                url, len(result.feeds), len(result.entries))
+                    processed_sites[url] = result.feeds
+                    self.results.append(result)
+                else:
+                    logger.warning("[%d/%d] ✗ %s: no RSS feeds found", index, len(urls), url)
+                    failed_sites.append((url, "No RSS feeds found"))
+        
+        self.store.finish_run()
+        self.close_session()
+        self.parse_pool.close()
+        self.save_state()
+        logger.info("Successfully processed: %d/%d websites", len(processed_sites), len(urls))
+        return site_results, processed_sites, failed_sites
+
+    def write_reports(self, urls, processed_sites, failed_sites):
+        """Write the processing report and the list of failed sites"""
+        with self.metrics.stage('report'):
             report_file = self.generate_report(urls, processed_sites, failed_sites)
+        logger.info("Detailed report saved to: %s", report_file)
+        
+        if failed_sites:
+            failed_file = self.output_path(f'failed_sites_{self.today}.txt')
+            with open(failed_file, 'w', encoding='utf-8') as f:
+                f.write(f"Failed websites - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write("="*80 + "\n\n")
+                for url, error in failed_sites:
+                    f.write(f"URL: {url}\nError: {error}\n\n")
+            logger.info("Failed sites have been saved to: %s", failed_file)
+
+    def write_outputs(self, results):
+        """Render the text files and the JSONL export of the run's day from the store.
+
+        The files are dated, so they hold everything the sites collected that
+        day up to this run. Each site's articles are read once; the output
+        writer thread writes the finished files while the next site is rendered.
+        """
+        text = self.output_format in ('text', 'both')
+        jsonl = self.output_format in ('jsonl', 'both')
+        merged = [f"All RSS News - {datetime.now().strftime('%Y-%m-%d')}\n", "=" * 80 + "\n\n"]
+        records = []
+        
+        with self.metrics.stage('outputs'), OutputWriter() as writer:
+            for result in results:
+                entries = self.store.day_articles(result.url)
+                if text:
+                    result.output_file = self.write_site_file(writer, result.url, result.feeds,
+                                                              entries)
+                    merged.append(self.merged_section(result.url, entries))
+                    logger.debug("Saving %s to %s", result.url, result.output_file)
+                if jsonl:
+                    domain = self.get_site_domain(result.url)
+                    records.extend(entry_record(entry, domain) for entry in entries)
+            os.makedirs(self.base_output_dir, exist_ok=True)
+            if text:
+                writer.write(self.merged_file, merged)
+            if jsonl:
+                writer.write(self.jsonl_file, records, self.jsonl_compression)
+        
+        logger.debug("Wrote %d output files, %d bytes", writer.files, writer.bytes)
+        if writer.failed:
+            logger.error("%d of %d output files could not be written to %s",
+                         writer.failed, writer.failed + writer.files, self.base_output_dir)
+            return
+        if text:
+            logger.info("All successful results have been merged into: %s", self.merged_file)
+        if jsonl:
+            logger.info("Articles exported as JSON lines to: %s", self.jsonl_file)
+
+    def write_pdf(self, results):
+        logger.debug("Creating PDF report...")
+        with self.metrics.stage('pdf'):
+            pdf_file = self.create_pdf_report(results)
+        if pdf_file:
+            logger.info("PDF report saved to: %s", pdf_file)
+
+    def render_stored_run(self, run_id=None, text=True, pdf=True, site_order=None):
+        """Write the text outputs or the PDF of a stored run, the latest by default.
+
+        `site_order` lists site URLs in the order to render them.
+        """
+        if self.store.use_run(run_id) is None:
+            logger.error("No %s in %s", 'runs' if run_id is None else f'run {run_id}',
+                         self.db_file)
+        else:
+            self.results = [SiteResult(url, feeds) for url, feeds in self.store.run_sites()]
+            if site_order:
+                position = {url: index for index, url in enumerate(site_order)}
+                self.results.sort(key=lambda result: position.get(result.url, len(position)))
+            logger.info("Rendering run %d: %d websites", self.store.run_id, len(self.results))
+            if text:
+                self.write_outputs(self.results)
+            if pdf:
+                self.write_pdf(self.results)
+        self.store.close()
+
+    def merge_shards(self, plan):
+        """Copy the finished shards' runs into one run, then render it.
+
+        Shards that are not done are left out and listed in the shard report.
+        """
+        manifest = plan.manifest
+        self.store.start_run()
+        statuses = []
+        for index in range(manifest['shards']):
+            status = plan.status(index)
+            if status['state'] == DONE:
+                # The run the worker finished, not whatever ran in its store later
+                if self.store.import_run(plan.db_file(index), status.get('run_id')) is None:
+                    status = dict(status, state=FAILED, error="Run missing from the shard's store")
+            statuses.append(status)
+        self.store.finish_run()
+        failed_sites = self.store.run_site_errors()
+        self.write_shard_report(manifest, statuses, failed_sites)
+        self.write_merged_report(manifest['urls'], statuses, failed_sites)
+        self.render_stored_run(self.store.run_id, site_order=manifest['urls'])
+        missing = sum(1 for status in statuses if status['state'] != DONE)
+        if missing:
+            logger.warning("%d of %d shards are missing from the merge; retry them with "
+                           "'work' or 'coordinate --resume'", missing, manifest['shards'])
+
+    def write_merged_report(self, urls, statuses, failed_sites):
+        """The processing report of the merged run, from the fetches the shards stored"""
+        fetches = self.store.run_fetches()
+        failed = {url for url, _ in failed_sites}
+        processed_sites = {url: feeds for url, feeds in self.store.run_sites()
+                           if url not in failed}
+
+        def feed_document(feed_url):
+            fetch = fetches.get(feed_url)
+            if fetch is None:
+                return FeedDocument(feed_url, error="Not fetched in this run")
+            status, size, elapsed, not_modified, entries, error, latest = fetch
+            feed = None if error else ParsedFeed([], entries or 0, latest)
+            return FeedDocument(feed_url, feed, status, size or 0, elapsed or 0.0, error,
+                                not_modified)
+
+        # The counters of the report come from the workers
+        done = [status for status in statuses if status['state'] == DONE]
+        counters = (sum(status.get('duplicates', 0) for status in done),
+                    sum(status.get('skipped', 0) for status in done))
+        report_file = self.generate_report(urls, processed_sites, failed_sites, feed_document,
+                                           counters)
+        logger.info("Detailed report saved to: %s", report_file)
+
+    def write_shard_report(self, manifest, statuses, failed_sites):
+        report_file = self.output_path(f'shard_report_{self.today}.txt')
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write("RSS Feed Shard Report\n")
+            f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"Plan created on: {manifest['created_at']}\n")
+            f.write("=" * 80 + "\n\n")
+            f.write(f"Total websites: {manifest['sites']}\n")
+            f.write(f"Shards merged: {sum(1 for s in statuses if s['state'] == DONE)}"
+                    f"/{manifest['shards']}\n")
+            f.write(f"Failed websites in merged shards: {len(failed_sites)}\n\n")
             
-            # Print summary
-            print("\n" + "="*80)
-            print(f"Processing complete!")
-            print(f"Successfully processed: {len(processed_sites)}/{len(urls)} websites")
-            print(f"Detailed report saved to: {report_file}")
-            
-            if failed_sites:
-                failed_file = os.path.join(self.base_output_dir, f'failed_sites_{self.today}.txt')
-                with open(failed_file, 'w', encoding='utf-8') as f:
-                    f.write(f"Failed websites - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write("="*80 + "\n\n")
-                    for url, error in failed_sites:
-                        f.write(f"URL: {url}\nError: {error}\n\n")
-                print(f"Failed sites have been saved to: {failed_file}")
+            f.write("Shards:\n")
+            f.write("-" * 40 + "\n")
+            for index, status in enumerate(statuses):
+                f.write(f"Shard {index}: {status['state']}, {status.get('sites', '?')} websites")
+                if status.get('host'):
+                    f.write(f", on {status['host']}")
+                if status.get('elapsed') is not None:
+                    f.write(f", {status['elapsed']:.1f}s")
+                f.write("\n")
+                if status.get('error'):
+                    f.write(f"  Error: {status['error'].strip().splitlines()[-1]}\n")
             
-            print(f"All successful results have been merged into: {self.merged_file}")
+            f.write("\n\nFailed Sites:\n")
+            f.write("-" * 40 + "\n")
+            for site, error in failed_sites:
+                f.write(f"\nSite: {site}\n")
+                f.write(f"Error: {error}\n")
+        logger.info("Shard report saved to: %s", report_file)
+
+    def discover_sites(self, urls):
+        """Find and cache the feeds of every site without collecting entries"""
+        found = 0
+        with self.thread_pool() as executor:
+            results = executor.map(self.site_feeds_or_none, urls)
+            for index, (url, feeds) in enumerate(zip(urls, results), 1):
+                if feeds:
+                    found += 1
+                    logger.info("[%d/%d] ✓ %s: %s", index, len(urls), url, ', '.join(feeds))
+                elif feeds is not None:
+                    logger.warning("[%d/%d] ✗ %s: no RSS feeds found", index, len(urls), url)
+        self.close_session()
+        self.parse_pool.close()
+        self.save_state()
+        logger.info("Found feeds for %d/%d websites", found, len(urls))
+
+    def run_daemon(self, filename='websites.txt', scheduler=None):
+        """Keep polling every feed on its own schedule until interrupted.
+
+        New entries go to the article store only; render reports from it
+        with a regular run.
+        """
+        filename = os.path.join(self.project_root, 'data', filename)
+        if scheduler is None:
+            scheduler = PollScheduler()
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        self.store.start_run()
+        next_discovery = 0
         
-            # After processing all sites, create PDF report
-            print("\nCreating PDF report...")
-            pdf_file = self.create_pdf_report()
-            if pdf_file:
-                print(f"PDF report saved to: {pdf_file}")
+        try:
+            with self.thread_pool() as executor:
+                while not stop.is_set():
+                    if time.time() >= next_discovery:
+                        self.schedule_sites(executor, self.read_urls(filename), scheduler)
+                        next_discovery = time.time() + self.DISCOVERY_CHECK_INTERVAL
+                    
+                    due = scheduler.pop_due()
+                    if due:
+                        self.poll_feeds(executor, due, scheduler)
+                    
+                    wait = next_discovery - time.time()
+                    next_due = scheduler.seconds_until_next()
+                    if next_due is not None:
+                        wait = min(wait, next_due)
+                    stop.wait(max(0, wait))
+        except FileNotFoundError:
+            self.create_example_file(filename)
+        except KeyboardInterrupt:
+            logger.info("Interrupted")
+        finally:
+            logger.info("Stopping daemon")
+            self.store.finish_run()
+            self.store.close()
+            self.close_session()
+            self.parse_pool.close()
+            self.save_state()
+
+    def thread_pool(self):
+        """Executor for site and feed work, profiled when a profiler is set"""
+        initializer = self.profiler.start_thread if self.profiler is not None else None
+        return ThreadPoolExecutor(max_workers=self.max_workers, initializer=initializer)
+
+    def write_metrics(self, site_results):
+        """Write the run's timings as JSON and CSV, and for Prometheus if enabled"""
+        summary = self.metrics.summary(site_results, self.feed_cache, self.get_site_domain)
+        stem = self.output_path(f'metrics_{self.today}')
+        self.metrics.write_json(f'{stem}.json', summary)
+        self.metrics.write_csv(f'{stem}.csv', summary)
+        if self.prometheus:
+            self.metrics.write_prometheus(f'{stem}.prom', summary)
+        logger.info("Timing metrics saved to: %s.json", stem)
+        for stage, seconds in summary['stages'].items():
+            logger.debug("Stage %s took %.2fs", stage, seconds)
+
+    def schedule_sites(self, executor, urls, scheduler):
+        """Discover the feeds of every listed site and add new ones to the schedule"""
+        sites = set(urls)
+        for url, feeds in zip(urls, executor.map(self.site_feeds_or_none, urls)):
+            if feeds is None:
+                continue
+            for feed_url in scheduler.feeds_of(url):
+                if feed_url not in feeds:
+                    scheduler.remove(feed_url)
+            for feed_url in feeds:
+                scheduler.add(feed_url, url)
+        # Sites taken off the list stop being polled
+        for feed_url in scheduler.urls():
+            if scheduler.site_of(feed_url) not in sites:
+                scheduler.remove(feed_url)
+        self.discovery_cache.save()
+        logger.info("Scheduled %d feeds from %d websites", len(scheduler), len(urls))
+
+    def site_feeds_or_none(self, url):
+        try:
+            return self.site_feeds(url, check_feeds=False)
+        except Exception as e:
+            logger.warning("Feed discovery failed for %s: %s", url, e)
+            return None
+
+    def poll_feeds(self, executor, due, scheduler):
+        """Fetch the due feeds, store their new entries and schedule them again"""
+        self.feed_cache.cutoff = datetime.now(timezone.utc) - self.since
+        new_entries = 0
+        for feed_url, entries in zip(due, executor.map(self.poll_feed, due)):
+            document = self.feed_cache.get(feed_url)
+            site_url = scheduler.site_of(feed_url)
+            delay = scheduler.reschedule(feed_url, document)
+            if scheduler.failures(feed_url) >= self.REDISCOVER_AFTER_FAILURES:
+                # Picked up again by the next discovery pass
+                self.discovery_cache.invalidate(site_url)
             
-            print("\nProcessing complete!")
+            entries = self.deduplicator.filter(entries)
+            new_entries += len(entries)
+            domain = self.get_site_domain(site_url)
+            site_id = self.store.record_site(site_url, domain)
+            feed_id = self.store.record_feed(feed_url, site_id)
+            self.store.record_fetch(feed_id, document)
+            self.store.add_articles(site_id, domain, entries)
+            logger.debug("Polled %s: %d new entries, next poll in %.0fs", feed_url,
+                         len(entries), delay)
         
-        except FileNotFoundError:
-            print(f"Error: File '{filename}' not found")
-            with open(filename, 'w', encoding='utf-8') as file:
-                file.write("www.wnp.pl\ndefence24.pl\n")
-            print(f"Created example {filename} file. Please add your websites and run again.")
+        self.store.flush()
+        self.save_state()
+        # The daemon never writes a metrics summary; keep memory flat
+        self.metrics.clear_requests()
+        logger.info("Polled %d feeds: %d new entries", len(due), new_entries)
+
+    def poll_feed(self, feed_url):
+        """Fetch a feed again (conditionally) and return its recent entries"""
+        self.feed_cache.forget(feed_url)
+        return self.get_recent_entries(feed_url)
+
+    def save_state(self):
+        """Persist the HTTP validators, discovered feeds, seen entries and host
+        health this command loaded"""
+        for state in (self._host_health, self._validators, self._discovery_cache,
+                      self._deduplicator):
+            if state is not None:
+                state.save()
+
+    def site_feeds(self, url, check_feeds=True):
+        """Feeds of a site, from the discovery cache or by discovering them.
+
+        With `check_feeds`, cached feeds that fail to load trigger a fresh
+        discovery.
+        """
+        feeds = self.discovery_cache.get(url)
+        if feeds is None:
+            feeds = self.discover_feeds(url)
+        elif check_feeds and any(self.feed_cache.get(feed).failed for feed in feeds):
+            logger.info("Cached feeds for %s are failing, rediscovering", url)
+            self.discovery_cache.invalidate(url)
+            feeds = self.discover_feeds(url)
+        return feeds
+
+    def process_site(self, url):
+        """Discover feeds for a site and collect its new recent entries.
+
+        Runs in a worker thread and returns a SiteResult.
+        """
+        try:
+            feeds = self.site_feeds(url)
+            
+            if not feeds:
+                return SiteResult(url)
+            
+            return SiteResult(url, feeds, self.collect_entries(feeds))
         except Exception as e:
-            print(f"Error processing file: {str(e)}")
+            return SiteResult(url, error=str(e))
+
+    def discover_feeds(self, url):
+        """Find the feeds for a site and remember them in the discovery cache"""
+        self.host_health.check(url)
+        if self.is_feed_url(url):
+            feeds = [url]
+        else:
+            # A host that did not answer the feed probe will not serve its
+            # homepage either
+            from host_health import host_of
+            error = self._unreachable.get(host_of(url))
+            if error is not None:
+                raise error
+            feeds = self.find_rss_feeds(url)
+        if feeds:
+            self.discovery_cache.put(url, feeds)
+        return feeds
+
+    def request(self, url, kind, **kwargs):
+        """GET through the shared session, guarded by the host's circuit breaker.
+
+        Returns the response and its metrics.RequestTiming; the caller adds
+        the download time and size once it has read the body.
+        """
+        import requests  # deferred, like the session
+        from host_health import host_of
+        from http_client import pop_connection_timings
+
+        self.host_health.check(url)
+        timing = self.metrics.start_request(url, kind)
+        pop_connection_timings()
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=self.timeout, **kwargs)
+        except requests.exceptions.RequestException as e:
+            timing.error = str(e)
+            self.host_health.record_failure(url, e)
+            if isinstance(e, (requests.exceptions.ConnectionError,
+                              requests.exceptions.Timeout)):
+                with self._host_lock:
+                    self._unreachable[host_of(url)] = e
+            raise
+        finally:
+            timing.ttfb = time.perf_counter() - start
+            timing.dns, timing.connect = pop_connection_timings()
+        timing.status = response.status_code
+        with self._host_lock:
+            self._unreachable.pop(host_of(url), None)
+        if response.status_code >= 500:
+            self.host_health.record_failure(url, f"HTTP {response.status_code}")
+        else:
+            self.host_health.record_success(url)
+        return response, timing
+
+    def fetch_feed(self, url, extra_headers=None):
+        """Download a feed, returning (status, content, headers) for the parser.
+
+        The body is streamed: anything that does not start like a feed is
+        refused after its first kilobyte, and oversized feeds are cut to
+        whole items. Error pages are not downloaded at all.
+        """
+        with self.host_slot(url):
+            response, timing = self.request(url, 'feed', headers=extra_headers, stream=True)
+            with response:
+                start = time.perf_counter()
+                try:
+                    if response.status_code >= 400:
+                        content = b''
+                    else:
+                        content, truncated = read_feed_body(
+                            response.iter_content(chunk_size=16384), self.feed_max_bytes,
+                            self.feed_max_items)
+                        if truncated:
+                            logger.debug("Cut %s to %d bytes of whole items", url, len(content))
+                except NotAFeed as e:
+                    timing.error = str(e)
+                    raise
+                finally:
+                    timing.download = time.perf_counter() - start
+                    timing.bytes = response.raw.tell()
+        headers = {
+            'content-type': response.headers.get('Content-Type', ''),
+            'content-location': response.url,
+            'etag': response.headers.get('ETag'),
+            'last-modified': response.headers.get('Last-Modified'),
+        }
+        return response.status_code, content, headers
+
+    def parse_feed(self, content, headers, url, cutoff):
+        """Parse downloaded feed bytes into normalized entries, in the parse pool"""
+        return self.parse_pool.run(parse_feed, content, headers, url, cutoff)
 
     def is_feed_url(self, url):
         """Check if the URL itself is a feed"""
         try:
-            feed = feedparser.parse(url)
-            return len(feed.entries) > 0
+            return self.feed_cache.get(url).total > 0
         except:
             return False
 
     def find_rss_feeds(self, url):
+        import requests
+        from host_health import HostUnavailable
+
         # Clean the URL first
         url = url.strip().strip('"').strip("'")
         
@@ -200,198 +835,90 @@ class RSSFinder:
                 return [url]
     
         try:
-            print(f"Searching for RSS feeds on {url}...")
-            response = requests.get(url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            feeds = set()
-            
-            # Look for RSS/Atom feed links
-            feed_links = soup.find_all('link', type=re.compile(r'application/(rss|atom)\+xml'))
-            for link in feed_links:
-                href = link.get('href', '')
-                if href:
-                    feeds.add(urljoin(url, href))
+            logger.debug("Searching for RSS feeds on %s", url)
+            # Feeds found on an unchanged homepage are reused on a 304
+            record = self.validators.get(url)
+            conditional = self.validators.request_headers(url) if record.get('feeds') else {}
+            with self.host_slot(url):
+                response, timing = self.request(url, 'homepage', headers=conditional,
+                                                stream=True)
+                with response:
+                    if response.status_code == 304 and conditional:
+                        logger.debug("Homepage %s not modified, reusing %d known feeds",
+                                     url, len(record['feeds']))
+                        return list(record['feeds'])
+                    response.raise_for_status()
+                    start = time.perf_counter()
+                    feeds = self.extract_feed_links(response, url)
+                    timing.download = time.perf_counter() - start
+                    timing.bytes = response.raw.tell()
             
             # If no feeds found but URL looks like a feed, try the URL itself
             if not feeds and self.is_feed_url(url):
                 return [url]
-                
+            
+            if feeds:
+                self.validators.update(url, response.headers, feeds=sorted(feeds))
             return list(feeds)
             
+        except (HostUnavailable, requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout):
+            # The host is unreachable; asking again whether the URL is a feed
+            # would only wait for the same timeout
+            raise
         except requests.exceptions.RequestException as e:
             # If the URL itself is a feed, return it even if website scraping fails
             if self.is_feed_url(url):
                 return [url]
-            print(f"Network error: {str(e)}")
+            logger.debug("Network error on %s: %s", url, e)
             return []
         except Exception as e:
-            print(f"Error: {str(e)}")
+            logger.warning("Error searching %s for feeds: %s", url, e)
             return []
 
+    def extract_feed_links(self, response, url):
+        """Collect RSS/Atom <link> URLs from a streamed homepage response"""
+        if self.discovery_mode == 'stream':
+            # Only read as far as the end of <head>, then drop the connection
+            return scan_feed_links(response.iter_content(chunk_size=8192), url,
+                                   response.encoding, self.discovery_max_bytes)
+        
+        return self.parse_pool.run(extract_feed_links_html, response.text, url)
+
     def is_valid_feed(self, content):
-        """Check if content appears to be a valid RSS/Atom feed"""
-        try:
-            # Look for common RSS/Atom elements
-            return bool(re.search(r'<(rss|feed|channel)[^>]*>', content))
-        except:
-            return False
+        """Check if content starts like an RSS/Atom feed"""
+        return looks_like_feed(content[:SNIFF_BYTES])
 
-    def get_recent_entries(self, feed_url, days=1):
+    def get_recent_entries(self, feed_url, days=None):
         try:
-            print(f"\nProcessing feed: {feed_url}")
-            feed = feedparser.parse(feed_url)
-            recent_entries = []
-            
-            # Get current time in UTC
-            now = datetime.now(pytz.UTC)
-            cutoff_date = now - timedelta(days=days)
-            
-            print(f"Found {len(feed.entries)} total entries")
-            
-            for entry in feed.entries:
-                try:
-                    # Print raw entry data for debugging
-                    print("\nEntry raw data:")
-                    for key, value in entry.items():
-                        print(f"{key}: {value}")
-                    
-                    # Try multiple date formats and fields
-                    pub_date = None
-                    
-                    # Common Polish date formats
-                    date_formats = [
-                        # Standard Formats
-                        '%a, %d %b %Y %H:%M:%S %z',      # RFC 822
-                        '%Y-%m-%dT%H:%M:%S%z',           # ISO 8601
-                        '%Y-%m-%dT%H:%M:%SZ',            # ISO 8601 UTC
-                        '%Y-%m-%dT%H:%M:%S.%f%z',        # ISO 8601 with microseconds
-                        '%Y-%m-%dT%H:%M:%S.%fZ',         # ISO 8601 UTC with microseconds
-                        
-                        # Common International Formats
-                        '%Y-%m-%d %H:%M:%S',             # International standard
-                        '%d-%m-%Y %H:%M:%S',             # European style
-                        '%m/%d/%Y %H:%M:%S',             # US style
-                        '%Y/%m/%d %H:%M:%S',             # Asian style
-                        
-                        # Variations without seconds
-                        '%Y-%m-%d %H:%M',
-                        '%d-%m-%Y %H:%M',
-                        '%m/%d/%Y %H:%M',
-                        '%Y/%m/%d %H:%M',
-                        
-                        # European Formats
-                        '%d.%m.%Y %H:%M:%S',             # German/Polish/Russian
-                        '%d.%m.%Y %H:%M',                # German/Polish/Russian without seconds
-                        '%d/%m/%Y %H:%M:%S',             # British/French
-                        '%d/%m/%Y %H:%M',                # British/French without seconds
-                        
-                        # With Month Names
-                        '%d %B %Y %H:%M:%S',             # Full month name
-                        '%d %b %Y %H:%M:%S',             # Abbreviated month name
-                        '%B %d, %Y %H:%M:%S',            # US style with month name
-                        '%b %d, %Y %H:%M:%S',            # US style with abbreviated month
-                        
-                        # Additional Timezone Formats
-                        '%a %b %d %H:%M:%S %Y %z',       # Unix style
-                        '%a %b %d %H:%M:%S %Z %Y',       # Alternative Unix style
-                        '%Y-%m-%d %H:%M:%S %z',          # ISO with space
-                        '%Y-%m-%d %H:%M:%S %Z',          # ISO with timezone name
-                        
-                        # Compact Formats
-                        '%Y%m%d%H%M%S',                  # Basic compact
-                        '%Y%m%d %H%M%S',                 # Compact with space
-                        
-                        # RSS Common Formats
-                        '%a, %d %b %Y %H:%M:%S GMT',
-                        '%a, %d %b %Y %H:%M:%S +0000',
-                        '%a, %d %b %Y %H:%M:%S PST',
-                        '%a, %d %b %Y %H:%M:%S EST'
-                    ]
-                    
-                    # Try all possible date fields
-                    date_fields = [
-                        'published',
-                        'updated',
-                        'created',
-                        'pubDate',
-                        'date',
-                        'modified',
-                        'dc:date',
-                        'lastBuildDate'
-                    ]
-                    
-                    # First try parsed fields
-                    for field in ['published_parsed', 'updated_parsed', 'created_parsed']:
-                        if hasattr(entry, field):
-                            time_struct = getattr(entry, field)
-                            if time_struct:
-                                pub_date = datetime.fromtimestamp(time.mktime(time_struct))
-                                pub_date = pytz.UTC.localize(pub_date)
-                                print(f"Found date using {field}: {pub_date}")
-                                break
-                    
-                    # If no parsed date, try string fields
-                    if not pub_date:
-                        for field in date_fields:
-                            if hasattr(entry, field):
-                                date_str = getattr(entry, field)
-                                print(f"Trying to parse date string: {date_str} from field {field}")
-                                for date_format in date_formats:
-                                    try:
-                                        pub_date = datetime.strptime(date_str, date_format)
-                                        if pub_date.tzinfo is None:
-                                            pub_date = pytz.UTC.localize(pub_date)
-                                        print(f"Successfully parsed date: {pub_date}")
-                                        break
-                                    except ValueError:
-                                        continue
-                            if pub_date:
-                                break
-                    
-                    # If still no date, add entry anyway with current time
-                    if not pub_date:
-                        print(f"Could not parse date for entry: {entry.title}")
-                        pub_date = now
-                    
-                    # Get full content using multiple fallback options
-                    content = ''
-                    # Try to get the full content first
-                    if hasattr(entry, 'content'):
-                        content = entry.content[0].get('value', '')
-                    # If no content, try the full article text
-                    if not content and hasattr(entry, 'article_text'):
-                        content = entry.article_text
-                    # Try summary next
-                    if not content and hasattr(entry, 'summary_detail'):
-                        content = entry.summary_detail.get('value', '')
-                    # Fall back to regular summary
-                    if not content and hasattr(entry, 'summary'):
-                        content = entry.summary
-                    # Last resort: description
-                    if not content:
-                        content = entry.get('description', 'No content available')
-                    
-                    recent_entries.append({
-                        'title': entry.title,
-                        'link': entry.link,
-                        'published': pub_date.strftime('%Y-%m-%d %H:%M:%S UTC'),
-                        'description': content  # Store full content without truncation
-                    })
-                
-                except Exception as e:
-                    print(f"Error processing entry: {str(e)}")
-                    continue
+            logger.debug("Processing feed: %s", feed_url)
+            if days is None:
+                cutoff_date = self.feed_cache.cutoff
+            else:
+                cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+            feed = self.feed_cache.get(feed_url, cutoff_date)
+            if feed.error:
+                raise Exception(feed.error)
             
+            logger.debug("Found %d total entries in %s", feed.total, feed_url)
+            recent_entries = [entry for entry in feed.entries if entry.published >= cutoff_date]
+            logger.debug("Kept %d entries from %s published since %s", len(recent_entries),
+                         feed_url, cutoff_date)
             return recent_entries
         
         except Exception as e:
-            print(f"Error processing feed {feed_url}: {str(e)}")
+            logger.warning("Error processing feed %s: %s", feed_url, e)
             return []
 
-    def generate_report(self, urls, processed_sites, failed_sites):
-        report_file = os.path.join(self.base_output_dir, f'processing_report_{self.today}.txt')
+    def generate_report(self, urls, processed_sites, failed_sites, feed_document=None,
+                        counters=None):
+        """Write the processing report; `feed_document` looks up a feed's
+        FeedDocument and `counters` are the (duplicates, skipped requests),
+        both from this run by default"""
+        feed_document = feed_document or self.feed_cache.get
+        duplicates, skipped = counters or (self.deduplicator.duplicates,
+                                           self.host_health.skipped)
+        report_file = self.output_path(f'processing_report_{self.today}.txt')
         
         with open(report_file, 'w', encoding='utf-8') as f:
             f.write("RSS Feed Processing Report\n")
@@ -404,7 +931,10 @@ class RSSFinder:
             f.write(f"Total websites to process: {len(urls)}\n")
             f.write(f"Successfully processed: {len(processed_sites)}\n")
             f.write(f"Failed to process: {len(failed_sites)}\n")
-            f.write(f"Success rate: {(len(processed_sites)/len(urls)*100):.2f}%\n\n")
+            f.write(f"Success rate: {(len(processed_sites)/len(urls)*100):.2f}%\n")
+            f.write(f"Entries collected from the last: {self.since}\n")
+            f.write(f"Duplicate entries skipped: {duplicates}\n")
+            f.write(f"Requests skipped for failing hosts: {skipped}\n\n")
             
             # Feed Entry Statistics
             f.write("\nFeed Entry Statistics:\n")
@@ -415,15 +945,21 @@ class RSSFinder:
                 site_total = 0
                 for feed in feeds:
                     try:
-                        feed_data = feedparser.parse(feed)
-                        entry_count = len(feed_data.entries)
+                        feed_data = feed_document(feed)
+                        if feed_data.error:
+                            raise Exception(feed_data.error)
+                        entry_count = feed_data.total
                         site_total += entry_count
                         f.write(f"- Feed: {feed}\n")
                         f.write(f"  Entries available: {entry_count}\n")
-                        if entry_count > 0:
-                            latest_entry = feed_data.entries[0]
-                            if hasattr(latest_entry, 'published'):
-                                f.write(f"  Latest entry date: {latest_entry.published}\n")
+                        if feed_data.not_modified:
+                            f.write(f"  Fetched: HTTP 304, reused cached copy "
+                                    f"in {feed_data.elapsed:.2f}s\n")
+                        else:
+                            f.write(f"  Fetched: HTTP {feed_data.status}, {feed_data.bytes} bytes "
+                                    f"in {feed_data.elapsed:.2f}s\n")
+                        if entry_count > 0 and feed_data.feed.latest_published:
+                            f.write(f"  Latest entry date: {feed_data.feed.latest_published}\n")
                     except Exception as e:
                         f.write(f"- Feed: {feed} (Error reading feed: {str(e)})\n")
                 f.write(f"Total entries for this site: {site_total}\n")
@@ -463,97 +999,325 @@ class RSSFinder:
         
         return report_file
 
-    def create_pdf_report(self):
-        pdf_file = os.path.join(self.base_output_dir, f'all_news_{self.today}.pdf')
-        doc = SimpleDocTemplate(
-            pdf_file,
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-
-        # Create styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            spaceAfter=30
-        )
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=20
-        )
-        normal_style = ParagraphStyle(
-            'CustomNormal',
-            parent=styles['Normal'],
-            fontSize=10,
-            spaceAfter=12
-        )
-        date_style = ParagraphStyle(
-            'CustomDate',
-            parent=styles['Italic'],
-            fontSize=8,
-            textColor=colors.gray
-        )
-
-        # Build content
-        story = []
-        
-        # Add title
-        story.append(Paragraph(f"RSS News Report - {datetime.now().strftime('%Y-%m-%d')}", title_style))
-        story.append(Spacer(1, 12))
-
-        # Process each site's folder
-        for site_folder in os.listdir(self.base_output_dir):
-            site_path = os.path.join(self.base_output_dir, site_folder)
-            if os.path.isdir(site_path):
-                # Add site header
-                story.append(Paragraph(f"Source: {site_folder}", heading_style))
-                story.append(Spacer(1, 12))
-
-                # Process news files in the folder
-                for file in os.listdir(site_path):
-                    if file.startswith('news_') and file.endswith('.txt'):
-                        file_path = os.path.join(site_path, file)
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                                
-                                # Parse and format the content
-                                for line in content.split('\n'):
-                                    if line.startswith('Title: '):
-                                        story.append(Paragraph(line[7:], heading_style))
-                                    elif line.startswith('Published: '):
-                                        story.append(Paragraph(line, date_style))
-                                    elif line.startswith('Link: '):
-                                        story.append(Paragraph(f'<link href="{line[6:]}">{line[6:]}</link>', normal_style))
-                                    elif line.startswith('Description: '):
-                                        story.append(Paragraph(line[13:], normal_style))
-                                    elif line.startswith('---'):  # Separator
-                                        story.append(Spacer(1, 20))
-                        except Exception as e:
-                            print(f"Error processing file {file}: {str(e)}")
-
-                # Add page break between sites
-                story.append(PageBreak())
+    def create_pdf_report(self, results):
+        """Render the articles of this run's day from the store into the PDF report"""
+        from pdf_report import build_pdf_report  # deferred: reportlab is slow to import
+
+        pdf_file = self.output_path(f'all_news_{self.today}.pdf')
+        title = f"RSS News Report - {datetime.now().strftime('%Y-%m-%d')}"
+
+        # One section per site folder, in the order the sites were listed.
+        # Articles are read from the store as each section is rendered, so
+        # only a chunk of the report is in memory at a time
+        site_urls = {}
+        for result in results:
+            site_urls.setdefault(self.get_site_domain(result.url), []).append(result.url)
+        sections = [(domain, self.stored_articles(urls)) for domain, urls in site_urls.items()]
 
         try:
-            # Build PDF
-            doc.build(story)
-            print(f"\nPDF report created: {pdf_file}")
+            options = {}
+            if self.pdf_description_chars is not None:
+                options['max_chars'] = self.pdf_description_chars
+            timings = build_pdf_report(pdf_file, title, sections, workers=self.pdf_workers,
+                                       **options)
+            for section, seconds in timings:
+                self.metrics.record_render(section, seconds)
+            logger.debug("PDF report created: %s", pdf_file)
             return pdf_file
         except Exception as e:
-            print(f"Error creating PDF: {str(e)}")
+            logger.error("Error creating PDF: %s", e)
             return None
 
-def main():
-    finder = RSSFinder()
-    finder.process_urls_from_file()
+    def stored_articles(self, site_urls):
+        """Lazily read the day's articles of each site from the store"""
+        for url in site_urls:
+            yield from self.store.day_articles(url)
+
+def parse_duration(value):
+    """Parse a duration like '90m', '6h', '2d' or '1w' into a timedelta"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([mhdw])\s*', value.lower())
+    if not match:
+        raise argparse.ArgumentTypeError(
+            f"invalid duration '{value}', expected e.g. 30m, 6h, 2d or 1w")
+    amount = float(match.group(1))
+    unit = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}[match.group(2)]
+    return timedelta(**{unit: amount})
+
+COMMANDS = ('run', 'discover', 'fetch', 'report', 'pdf', 'daemon', 'plan', 'work', 'coordinate',
+            'merge')
+
+def parse_args(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Without a command, do a full run as before commands existed
+    if not argv or argv[0] not in COMMANDS + ('-h', '--help'):
+        argv = ['run'] + argv
+
+    common = argparse.ArgumentParser(add_help=False)
+    verbosity = common.add_mutually_exclusive_group()
+    verbosity.add_argument('-v', '--verbose', action='count', default=0,
+                           help='more output: -v for per-feed details, -vv adds raw entry dumps')
+    verbosity.add_argument('-q', '--quiet', action='store_true',
+                           help='only report warnings and errors')
+    common.add_argument('--db', default=None,
+                        help='SQLite article store (default: rss_news.sqlite3 in the '
+                             'project root)')
+    common.add_argument('--profile', action='store_true',
+                        help='profile the command with cProfile and save the stats in the '
+                             'output directory')
+
+    network = argparse.ArgumentParser(add_help=False)
+    network.add_argument('--workers', type=int, default=8,
+                         help='number of websites processed concurrently (default: 8)')
+    network.add_argument('--per-host', type=int, default=2,
+                         help='maximum concurrent requests to a single host (default: 2)')
+    network.add_argument('--parse-workers', type=int, default=0,
+                         help='parse feeds and homepages in this many worker processes; '
+                              '0 or 1 parses in the fetching threads (default: 0)')
+    network.add_argument('--connect-timeout', type=float, default=5,
+                         help='seconds to wait for a connection to a host (default: 5)')
+    network.add_argument('--read-timeout', type=float, default=15,
+                         help='seconds to wait for data from an open connection (default: 15)')
+    network.add_argument('--circuit-threshold', type=int, default=3,
+                         help='consecutive failures after which a host is skipped for a '
+                              'while, growing with further failures; 0 never skips (default: 3)')
+    network.add_argument('--retries', type=int, default=2,
+                         help='retries with backoff for failed or throttled requests (default: 2)')
+    network.add_argument('--discovery-ttl', type=float, default=7 * 24,
+                         help='hours before a site\'s feeds are rediscovered (default: 168)')
+    network.add_argument('--rediscover', action='store_true',
+                         help='ignore cached feed lists and scrape every homepage again')
+    network.add_argument('--discovery-mode', choices=['stream', 'full'], default='stream',
+                         help='scan only the homepage <head> as it streams in, or parse '
+                              'the full page with BeautifulSoup (default: stream)')
+    network.add_argument('--feed-max-bytes', type=int, default=5 * 1024 * 1024,
+                         help='cut feeds larger than this many bytes after their last whole '
+                              'item (default: 5242880)')
+    network.add_argument('--feed-max-items', type=int, default=0,
+                         help='stop downloading a feed after this many items; 0 reads every '
+                              'item (default: 0)')
+    network.add_argument('--discovery-max-bytes', type=int, default=512 * 1024,
+                         help='stop reading a homepage after this many bytes (default: 524288)')
+
+    collect = argparse.ArgumentParser(add_help=False)
+    collect.add_argument('--since', type=parse_duration, default=timedelta(days=1),
+                         help='only collect entries published within this window, '
+                              'e.g. 6h, 2d or 1w (default: 1d)')
+    collect.add_argument('--seen-ttl', type=parse_duration, default=timedelta(days=7),
+                         help='skip articles already collected within this period in earlier '
+                              'runs; 0m only removes duplicates within a run (default: 7d)')
+
+    sites = argparse.ArgumentParser(add_help=False)
+    sites.add_argument('urls', nargs='*', metavar='url',
+                       help='websites or feeds to process instead of data/websites.txt')
+
+    stored_run = argparse.ArgumentParser(add_help=False)
+    stored_run.add_argument('--run', type=int, default=None,
+                            help='id of the stored run to render (default: the latest)')
+
+    outputs = argparse.ArgumentParser(add_help=False)
+    outputs.add_argument('--output-format', choices=['text', 'jsonl', 'both'], default='text',
+                         help='write the site and merged text files, a JSON lines export of '
+                              'the articles, or both (default: text)')
+    outputs.add_argument('--jsonl-compression', choices=['gzip', 'zstd', 'none'],
+                         default='gzip',
+                         help='compression of the JSON lines export; zstd needs the '
+                              'zstandard package (default: gzip)')
+
+    pdf = argparse.ArgumentParser(add_help=False)
+    pdf.add_argument('--pdf-workers', type=int, default=0,
+                     help='render per-site PDF sections in this many processes and merge '
+                          'them (needs pypdf); 0 streams one document (default: 0)')
+    pdf.add_argument('--pdf-description-chars', type=int, default=None,
+                     help='truncate descriptions in the PDF to this many characters '
+                          '(default: 1500)')
+
+    shard_dir = argparse.ArgumentParser(add_help=False)
+    shard_dir.add_argument('--shard-dir', default=None,
+                           help='directory shared by the shard workers (default: shards in '
+                                'the project root)')
+
+    planning = argparse.ArgumentParser(add_help=False)
+    planning.add_argument('--shards', type=int, default=4,
+                          help='number of shards to split the websites into by domain '
+                               '(default: 4)')
+
+    parser = argparse.ArgumentParser(
+        description='Collect recent news from RSS feeds. Without a command, does a full run.')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    run = commands.add_parser(
+        'run', parents=[common, network, collect, sites, outputs, pdf],
+        help='collect new entries, then write the report, text outputs and PDF (default)')
+    run.add_argument('--prometheus', action='store_true',
+                     help='also write the run\'s timing metrics in Prometheus text format')
+    commands.add_parser('discover', parents=[common, network, sites],
+                        help='find and cache the feeds of each website')
+    commands.add_parser('fetch', parents=[common, network, collect, sites],
+                        help='collect new entries into the article store without writing '
+                             'any reports')
+    commands.add_parser('report', parents=[common, stored_run, outputs],
+                        help='write the text files or JSON lines export of a stored run')
+    commands.add_parser('pdf', parents=[common, stored_run, pdf],
+                        help='write the PDF report of a stored run')
+    daemon = commands.add_parser(
+        'daemon', parents=[common, network, collect],
+        help='keep running and poll each feed on its own adaptive schedule, '
+             'storing new entries in the article store')
+    daemon.add_argument('--min-interval', type=parse_duration, default=timedelta(minutes=5),
+                        help='shortest time between polls of a feed (default: 5m)')
+    daemon.add_argument('--max-interval', type=parse_duration, default=timedelta(days=1),
+                        help='longest time between polls of a feed (default: 1d)')
+    commands.add_parser('plan', parents=[common, shard_dir, planning, sites],
+                        help='split the websites into shards for separate workers')
+    work = commands.add_parser('work', parents=[common, network, collect, shard_dir],
+                               help='collect one shard into its own article store')
+    work.add_argument('index', type=int, help='number of the shard, from 0')
+    coordinate = commands.add_parser(
+        'coordinate', parents=[common, network, collect, shard_dir, planning, sites, outputs, pdf],
+        help='plan shards, run them in local worker processes and merge them')
+    coordinate.add_argument('--jobs', type=int, default=4,
+                            help='shards collected at the same time (default: 4)')
+    coordinate.add_argument('--attempts', type=int, default=2,
+                            help='times a failing shard is run before giving up (default: 2)')
+    coordinate.add_argument('--resume', action='store_true',
+                            help='keep the existing plan and only run shards that are not done')
+    commands.add_parser('merge', parents=[common, shard_dir, outputs, pdf],
+                        help='combine the finished shards into one run and write its '
+                             'text outputs, PDF and shard report')
+    return parser.parse_args(argv)
+
+def configure_logging(verbose=0, quiet=False):
+    if quiet:
+        level = logging.WARNING
+    elif verbose >= 2:
+        level = DEBUG_RAW
+    elif verbose == 1:
+        level = logging.DEBUG
+    else:
+        level = logging.INFO
+    logging.basicConfig(level=level, stream=sys.stdout,
+                        format='%(asctime)s %(levelname)-7s %(message)s', datefmt='%H:%M:%S')
+
+# Command-line options passed straight to RSSFinder, for the commands that have them
+FINDER_OPTIONS = (
+    ('workers', 'max_workers'), ('per_host', 'per_host_limit'), ('retries', 'retries'),
+    ('discovery_mode', 'discovery_mode'), ('discovery_max_bytes', 'discovery_max_bytes'),
+    ('since', 'since'), ('pdf_workers', 'pdf_workers'),
+    ('pdf_description_chars', 'pdf_description_chars'), ('parse_workers', 'parse_workers'),
+    ('connect_timeout', 'connect_timeout'), ('read_timeout', 'read_timeout'),
+    ('circuit_threshold', 'circuit_threshold'), ('prometheus', 'prometheus'),
+    ('output_format', 'output_format'), ('jsonl_compression', 'jsonl_compression'),
+    ('feed_max_bytes', 'feed_max_bytes'), ('feed_max_items', 'feed_max_items'),
+)
+
+def finder_options(args):
+    options = {keyword: getattr(args, name) for name, keyword in FINDER_OPTIONS
+               if hasattr(args, name)}
+    if hasattr(args, 'discovery_ttl'):
+        options['discovery_ttl'] = 0 if args.rediscover else args.discovery_ttl * 3600
+    if hasattr(args, 'seen_ttl'):
+        options['seen_ttl'] = args.seen_ttl.total_seconds()
+    return options
+
+def create_finder(args):
+    return RSSFinder(db_file=args.db, **finder_options(args))
+
+def work_on_shard(plan, index, options):
+    """Collect one shard into its own store and caches; True if it finished"""
+    start = time.time()
+    plan.write_status(index, RUNNING)
+    try:
+        # The shard directory may be on a network filesystem, where WAL does not work
+        finder = RSSFinder(db_file=plan.db_file(index), cache_dir=plan.cache_dir(index),
+                           journal_mode='DELETE', **options)
+        urls = finder.read_urls(plan.urls_file(index))
+        logger.info("Shard %d: %d websites", index, len(urls))
+        finder.collect_sites(urls)
+        run_id = finder.store.run_id
+        finder.store.close()
+        counters = {'duplicates': finder.deduplicator.duplicates,
+                    'skipped': finder.host_health.skipped}
+    except Exception as e:
+        logger.error("Shard %d failed: %s", index, e)
+        plan.write_status(index, FAILED, error=traceback.format_exc(),
+                          elapsed=time.time() - start)
+        return False
+    plan.write_status(index, DONE, sites=len(urls), run_id=run_id, elapsed=time.time() - start,
+                      **counters)
+    return True
+
+def run_shards(plan, options, jobs, attempts):
+    """Run the shards that are not done in local processes, retrying failures"""
+    for attempt in range(1, attempts + 1):
+        pending = plan.unfinished()
+        if not pending:
+            return
+        logger.info("Running %d shards, %d at a time (attempt %d of %d)", len(pending),
+                    jobs, attempt, attempts)
+        with ProcessPoolExecutor(max_workers=max(1, min(jobs, len(pending)))) as executor:
+            list(executor.map(work_on_shard, [plan] * len(pending), pending,
+                              [options] * len(pending)))
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_logging(args.verbose, args.quiet)
+    finder = create_finder(args)
+    if args.profile:
+        # Profiles the main thread and every worker thread, merged into one file
+        finder.profiler = ThreadProfiler()
+        try:
+            finder.profiler.run(run_finder, finder, args)
+        finally:
+            profile_file = finder.output_path(
+                f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof")
+            finder.profiler.dump(profile_file)
+            logger.info("Profile saved to: %s (view with python -m pstats)", profile_file)
+    else:
+        run_finder(finder, args)
+
+def run_finder(finder, args):
+    urls = [finder.clean_url(url) for url in getattr(args, 'urls', None) or []] or None
+    if args.command == 'daemon':
+        finder.run_daemon(scheduler=PollScheduler(args.min_interval.total_seconds(),
+                                                  args.max_interval.total_seconds()))
+    elif args.command == 'discover':
+        urls = urls or finder.listed_urls()
+        if urls:
+            finder.discover_sites(urls)
+    elif args.command == 'report':
+        finder.render_stored_run(args.run, pdf=False)
+    elif args.command == 'pdf':
+        finder.render_stored_run(args.run, text=False)
+    elif args.command in ('plan', 'work', 'coordinate', 'merge'):
+        run_shard_command(finder, args, urls)
+    else:
+        finder.process_urls_from_file(urls=urls, render=args.command == 'run')
+
+def run_shard_command(finder, args, urls):
+    plan = ShardPlan(args.shard_dir or os.path.join(finder.project_root, 'shards'))
+    if args.command == 'plan' or (args.command == 'coordinate' and
+                                  not (args.resume and os.path.exists(plan.manifest_file))):
+        urls = urls or finder.listed_urls()
+        if not urls:
+            return
+        plan.create(urls, max(1, args.shards))
+        logger.info("Split %d websites into %d shards in %s", len(urls), plan.shards,
+                    plan.shard_dir)
+    elif not os.path.exists(plan.manifest_file):
+        logger.error("No shard plan in %s; create one with 'plan'", plan.shard_dir)
+        sys.exit(1)
+    
+    if args.command == 'work':
+        if not 0 <= args.index < plan.shards:
+            logger.error("Shard %d does not exist; the plan has %d shards", args.index,
+                         plan.shards)
+            sys.exit(1)
+        if not work_on_shard(plan, args.index, finder_options(args)):
+            sys.exit(1)
+    elif args.command == 'coordinate':
+        run_shards(plan, finder_options(args), args.jobs, args.attempts)
+        finder.merge_shards(plan)
+    elif args.command == 'merge':
+        finder.merge_shards(plan)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,125 @@
+import heapq
+import itertools
+import time
+
+
+class FeedState:
+    """Polling state of one feed"""
+
+    __slots__ = ('url', 'site_url', 'interval', 'failures', 'due', 'version')
+
+    def __init__(self, url, site_url, interval, due):
+        self.url = url
+        self.site_url = site_url
+        self.interval = interval
+        self.failures = 0
+        self.due = due
+        self.version = 0
+
+
+class PollScheduler:
+    """Priority queue deciding when each feed is polled next.
+
+    Feeds are polled about twice per observed gap between their entries,
+    never more often than their <ttl>/sy:updatePeriod hint, and back off
+    exponentially while failing. Feeds with no usable history slowly
+    stretch their interval. Every interval stays within
+    [`min_interval`, `max_interval`] seconds.
+    """
+
+    GROWTH = 1.5
+
+    def __init__(self, min_interval=5 * 60, max_interval=24 * 3600, default_interval=3600):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_interval = default_interval
+        self._feeds = {}
+        self._heap = []
+        self._counter = itertools.count()
+
+    def __contains__(self, url):
+        return url in self._feeds
+
+    def __len__(self):
+        return len(self._feeds)
+
+    def add(self, url, site_url, due=None):
+        """Start polling a feed, immediately unless `due` says otherwise"""
+        if url in self._feeds:
+            return
+        interval = min(self.max_interval, max(self.min_interval, self.default_interval))
+        state = FeedState(url, site_url, interval, time.time() if due is None else due)
+        self._feeds[url] = state
+        self._push(state)
+
+    def remove(self, url):
+        # The heap entry is skipped once its version no longer matches
+        self._feeds.pop(url, None)
+
+    def urls(self):
+        return list(self._feeds)
+
+    def site_of(self, url):
+        return self._feeds[url].site_url
+
+    def failures(self, url):
+        """Consecutive failed polls of a feed"""
+        return self._feeds[url].failures
+
+    def feeds_of(self, site_url):
+        return [state.url for state in self._feeds.values() if state.site_url == site_url]
+
+    def _push(self, state):
+        # A fresh version for every push also breaks ties between equal due times
+        state.version = next(self._counter)
+        heapq.heappush(self._heap, (state.due, state.version, state.url))
+
+    def pop_due(self, now=None):
+        """URLs of all feeds due by `now`; they stay out of the queue until rescheduled"""
+        now = time.time() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, version, url = heapq.heappop(self._heap)
+            state = self._feeds.get(url)
+            if state is not None and state.version == version:
+                due.append(url)
+        return due
+
+    def seconds_until_next(self, now=None):
+        """Time until the next feed is due, or None with nothing scheduled"""
+        now = time.time() if now is None else now
+        while self._heap:
+            due, version, url = self._heap[0]
+            state = self._feeds.get(url)
+            if state is not None and state.version == version:
+                return max(0.0, due - now)
+            heapq.heappop(self._heap)
+        return None
+
+    def reschedule(self, url, document, now=None):
+        """Queue a polled feed again based on the FeedDocument it produced"""
+        state = self._feeds.get(url)
+        if state is None:
+            return None
+        now = time.time() if now is None else now
+        if document.failed:
+            state.failures += 1
+            delay = state.interval * 2 ** state.failures
+        else:
+            state.failures = 0
+            state.interval = self.next_interval(state.interval, document.feed)
+            delay = state.interval
+        delay = min(self.max_interval, max(self.min_interval, delay))
+        state.due = now + delay
+        self._push(state)
+        return delay
+
+    def next_interval(self, interval, parsed):
+        """Polling interval for a feed after a successful poll"""
+        if parsed.publish_interval:
+            interval = parsed.publish_interval / 2
+        else:
+            interval *= self.GROWTH
+        if parsed.poll_hint:
+            interval = max(interval, parsed.poll_hint)
+        return min(self.max_interval, max(self.min_interval, interval))
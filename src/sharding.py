@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+import socket
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+from json_state import load_json, write_json
+
+# Shard states written by the workers
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+
+
+def shard_of(url, shards):
+    """Stable shard number of a URL's domain.
+
+    Every site of a domain lands in the same shard on every machine and in
+    every run, so its per-host limits and caches stay with one worker.
+    """
+    domain = urlparse(url).netloc.lower().replace('www.', '')
+    digest = hashlib.sha1(domain.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % shards
+
+
+def split_urls(urls, shards):
+    """The URLs of each shard, in list order"""
+    parts = [[] for _ in range(shards)]
+    for url in urls:
+        parts[shard_of(url, shards)].append(url)
+    return parts
+
+
+class ShardPlan:
+    """A website list split into shards in a directory shared by the workers.
+
+    Each shard gets a folder with its site list, its own article store and
+    HTTP caches, and a status file that only its worker writes, so workers
+    on other machines never contend for a file.
+    """
+
+    def __init__(self, shard_dir):
+        self.shard_dir = shard_dir
+        self.manifest_file = os.path.join(shard_dir, 'manifest.json')
+
+    def create(self, urls, shards):
+        """Split `urls` into `shards` shards and mark them all pending"""
+        os.makedirs(self.shard_dir, exist_ok=True)
+        for index, part in enumerate(split_urls(urls, shards)):
+            os.makedirs(self.folder(index), exist_ok=True)
+            with open(self.urls_file(index), 'w', encoding='utf-8') as f:
+                f.write(''.join(f'{url}\n' for url in part))
+            self.write_status(index, PENDING, sites=len(part))
+        write_json(self.manifest_file, {
+            'shards': shards,
+            'sites': len(urls),
+            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'urls': urls,
+        }, indent=1)
+
+    @property
+    def manifest(self):
+        with open(self.manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @property
+    def shards(self):
+        return self.manifest['shards']
+
+    def folder(self, index):
+        return os.path.join(self.shard_dir, f'shard_{index}')
+
+    def urls_file(self, index):
+        return os.path.join(self.folder(index), 'websites.txt')
+
+    def db_file(self, index):
+        return os.path.join(self.folder(index), 'rss_news.sqlite3')
+
+    def cache_dir(self, index):
+        return os.path.join(self.folder(index), '.http_cache')
+
+    def status(self, index):
+        return load_json(os.path.join(self.folder(index), 'status.json'), {'state': PENDING})
+
+    def write_status(self, index, state, **details):
+        status = dict(details, state=state, host=socket.gethostname(), pid=os.getpid(),
+                      updated_at=time.time())
+        write_json(os.path.join(self.folder(index), 'status.json'), status, indent=1)
+
+    def unfinished(self):
+        """Shards that are not done yet, including failed ones"""
+        return [index for index in range(self.shards) if self.status(index)['state'] != DONE]
@@ -0,0 +1,107 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from article_store import ArticleStore  # noqa: E402
+from feed_cache import FeedDocument  # noqa: E402
+from models import Entry  # noqa: E402
+
+PUBLISHED = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+def add_site(store, site_url, entries):
+    site_id = store.record_site(site_url, site_url.split('//')[1])
+    for entry in entries:
+        store.record_feed(entry.feed_url, site_id)
+    store.add_articles(site_id, site_url.split('//')[1], entries)
+
+
+def test_sites_sharing_a_guid_keep_their_own_articles(tmp_path):
+    store = ArticleStore(str(tmp_path / 'news.sqlite3'))
+    store.start_run()
+    add_site(store, 'https://siteA.pl', [Entry('Article A', 'https://siteA.pl/a', PUBLISHED, '',
+                                               '12345', 'https://siteA.pl/rss')])
+    add_site(store, 'https://siteB.pl', [Entry('Article B', 'https://siteB.pl/b', PUBLISHED, '',
+                                               '12345', 'https://siteB.pl/rss')])
+    store.finish_run()
+    [entry_b] = store.run_articles('https://siteB.pl')
+    assert (entry_b.title, entry_b.link) == ('Article B', 'https://siteB.pl/b')
+    assert len(store.run_articles('https://siteA.pl')) == 1
+    store.close()
+
+
+def test_imported_run_keeps_links_of_each_site(tmp_path):
+    shard = ArticleStore(str(tmp_path / 'shard.sqlite3'))
+    shard.start_run()
+    add_site(shard, 'https://siteB.pl', [Entry('Article B', 'https://siteB.pl/b', PUBLISHED, '',
+                                               '12345', 'https://siteB.pl/rss')])
+    shard.finish_run()
+    shard.close()
+
+    store = ArticleStore(str(tmp_path / 'news.sqlite3'))
+    store.start_run()
+    add_site(store, 'https://siteA.pl', [Entry('Article A', 'https://siteA.pl/a', PUBLISHED, '',
+                                               '12345', 'https://siteA.pl/rss')])
+    assert store.import_run(str(tmp_path / 'shard.sqlite3')) is not None
+    store.finish_run()
+    [entry_b] = store.run_articles('https://siteB.pl')
+    assert entry_b.link == 'https://siteB.pl/b'
+    [entry_a] = store.run_articles('https://siteA.pl')
+    assert entry_a.link == 'https://siteA.pl/a'
+    store.close()
+
+
+def test_later_run_of_the_day_keeps_earlier_articles(tmp_path):
+    store = ArticleStore(str(tmp_path / 'news.sqlite3'))
+    entry = Entry('Article A', 'https://siteA.pl/a', datetime.now(timezone.utc), '', '12345',
+                  'https://siteA.pl/rss')
+    store.start_run()
+    add_site(store, 'https://siteA.pl', [entry])
+    store.finish_run()
+    # The next run finds nothing new; the deduplicator already saw the article
+    store.start_run()
+    add_site(store, 'https://siteA.pl', [])
+    store.finish_run()
+    assert store.run_articles('https://siteA.pl') == []
+    [kept] = store.day_articles('https://siteA.pl')
+    assert kept.link == 'https://siteA.pl/a'
+    store.close()
+
+
+def test_article_seen_again_takes_its_new_link(tmp_path):
+    store = ArticleStore(str(tmp_path / 'news.sqlite3'))
+    store.start_run()
+    add_site(store, 'https://siteA.pl', [Entry('Article A', 'https://siteA.pl/a?utm=1', PUBLISHED,
+                                               '', '12345', 'https://siteA.pl/rss')])
+    store.finish_run()
+    # Same GUID and feed, so the same row; the site moved the article
+    store.start_run()
+    add_site(store, 'https://siteA.pl', [Entry('Article A', 'https://siteA.pl/news/a', PUBLISHED,
+                                               '', '12345', 'https://siteA.pl/rss')])
+    store.finish_run()
+    [entry] = store.run_articles('https://siteA.pl')
+    assert entry.link == 'https://siteA.pl/news/a'
+    store.close()
+
+
+def test_sites_sharing_a_feed_both_list_it(tmp_path):
+    store = ArticleStore(str(tmp_path / 'news.sqlite3'))
+    store.start_run()
+    shared = 'https://feeds.example.com/news.xml'
+    for site_url in ('https://siteA.pl', 'https://siteB.pl'):
+        site_id = store.record_site(site_url, site_url.split('//')[1])
+        feed_id = store.record_feed(shared, site_id)
+    store.record_fetch(feed_id, FeedDocument(shared, status=200))
+    store.finish_run()
+    sites = [('https://siteA.pl', [shared]), ('https://siteB.pl', [shared])]
+    assert store.run_sites() == sites
+    store.close()
+
+    merged = ArticleStore(str(tmp_path / 'merged.sqlite3'))
+    merged.start_run()
+    merged.import_run(str(tmp_path / 'news.sqlite3'))
+    merged.finish_run()
+    assert merged.run_sites() == sites
+    merged.close()
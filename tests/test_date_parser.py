@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from date_parser import DateParser, struct_time_to_datetime  # noqa: E402
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('15 stycznia 2024 10:30', utc(2024, 1, 15, 10, 30)),
+    ('3 października 2024 08:05:00', utc(2024, 10, 3, 8, 5)),
+    ('3 pazdziernika 2024 08:05', utc(2024, 10, 3, 8, 5)),
+    ('Wtorek, 1 maja 2024 12:00', utc(2024, 5, 1, 12)),
+    ('śr., 5 czerwca 2024 12:00:00 +0200', utc(2024, 6, 5, 10)),
+    ('pt, 20 gru 2024 18:00:00 GMT', utc(2024, 12, 20, 18)),
+    ('21 Września 2024 07:00', utc(2024, 9, 21, 7)),
+])
+def test_polish_month_and_weekday_names(text, expected):
+    assert DateParser().parse(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Mon, 01 Jul 2024 12:00:00 +0200', utc(2024, 7, 1, 10)),
+    ('Mon, 01 Jul 2024 12:00:00 -05:30', utc(2024, 7, 1, 17, 30)),
+    ('Mon, 01 Jul 2024 12:00:00 CEST', utc(2024, 7, 1, 10)),
+    ('Mon, 01 Jul 2024 12:00:00 GMT', utc(2024, 7, 1, 12)),
+    ('Mon, 01 Jul 2024 12:00:00 EDT', utc(2024, 7, 1, 16)),
+    ('2024-07-01T12:00:00+02:00', utc(2024, 7, 1, 10)),
+    ('2024-07-01T12:00:00Z', utc(2024, 7, 1, 12)),
+    ('2024-07-01 12:00:00 CET', utc(2024, 7, 1, 11)),
+])
+def test_numeric_offsets_and_zone_names(text, expected):
+    assert DateParser().parse(text) == expected
+
+
+def test_unknown_zone_name_is_not_read_as_utc():
+    assert DateParser().parse('Mon, 01 Jul 2024 12:00:00 XYZ') is None
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Mon, 01 Jul 24 12:00:00 GMT', utc(2024, 7, 1, 12)),
+    ('Thu, 01 Jan 98 00:00:00 GMT', utc(1998, 1, 1)),
+])
+def test_two_digit_years(text, expected):
+    assert DateParser().parse(text) == expected
+
+
+@pytest.mark.skipif(not hasattr(time, 'tzset'), reason='needs time.tzset')
+@pytest.mark.parametrize('zone', ['UTC', 'Europe/Warsaw', 'America/New_York', 'Asia/Kolkata'])
+def test_struct_time_is_read_as_utc_in_any_local_timezone(zone, monkeypatch):
+    monkeypatch.setenv('TZ', zone)
+    time.tzset()
+    try:
+        moment = utc(2024, 3, 31, 1, 30)
+        assert struct_time_to_datetime(time.gmtime(moment.timestamp())) == moment
+    finally:
+        monkeypatch.undo()
+        time.tzset()
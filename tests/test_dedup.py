@@ -0,0 +1,46 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from dedup import EntryDeduplicator, entry_keys  # noqa: E402
+from models import Entry  # noqa: E402
+
+PUBLISHED = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+def test_same_guid_on_different_sites_is_not_a_duplicate():
+    entry_a = Entry('Article A', 'https://siteA.pl/a', PUBLISHED, '', '12345',
+                    'https://siteA.pl/rss')
+    entry_b = Entry('Article B', 'https://siteB.pl/b', PUBLISHED, '', '12345',
+                    'https://siteB.pl/rss')
+    deduplicator = EntryDeduplicator()
+    assert deduplicator.filter([entry_a]) == [entry_a]
+    assert deduplicator.filter([entry_b]) == [entry_b]
+    assert entry_keys(entry_a)[0] != entry_keys(entry_b)[0]
+
+
+def test_same_guid_in_one_feed_is_a_duplicate():
+    entry = Entry('Article', 'https://site.pl/a', PUBLISHED, '', '12345', 'https://site.pl/rss')
+    copy = Entry('Article', 'https://site.pl/a?utm_source=x', PUBLISHED, '', '12345',
+                 'https://site.pl/rss')
+    deduplicator = EntryDeduplicator()
+    assert deduplicator.filter([entry, copy]) == [entry]
+
+
+def test_history_expires_keys_by_first_seen_time(tmp_path, monkeypatch):
+    history_file = str(tmp_path / 'seen.json')
+    entry = Entry('Article', 'https://site.pl/a', PUBLISHED, '', '', 'https://site.pl/rss')
+    clock = [1000.0]
+    monkeypatch.setattr('dedup.time.time', lambda: clock[0])
+
+    deduplicator = EntryDeduplicator(history_file, ttl=60)
+    assert deduplicator.filter([entry]) == [entry]
+    clock[0] += 30
+    deduplicator.save()
+    assert deduplicator.filter([entry]) == []
+    # Saving again must not refresh the key, so it expires 60s after first seen
+    clock[0] += 40
+    deduplicator.save()
+    assert deduplicator.filter([entry]) == [entry]
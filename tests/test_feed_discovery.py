@@ -0,0 +1,62 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from feed_discovery import scan_feed_links  # noqa: E402
+from parsing import extract_feed_links_html  # noqa: E402
+
+BASE_URL = 'https://example.pl/'
+
+
+def chunked(page, size=7):
+    data = page.encode('utf-8')
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+def assert_same_feeds(page, expected):
+    assert extract_feed_links_html(page, BASE_URL) == expected
+    assert scan_feed_links(chunked(page), BASE_URL, 'utf-8') == expected
+
+
+def test_head_links_match_full_page_parse():
+    assert_same_feeds(
+        '<html><head><title>Wiadomości – żółw</title>'
+        '<link rel="alternate" type="application/rss+xml" href="/rss.xml">'
+        '<link rel="alternate" type="application/atom+xml" href="https://example.pl/atom"/>'
+        '<link rel="stylesheet" type="text/css" href="/style.css">'
+        '</head><body></body></html>',
+        {'https://example.pl/rss.xml', 'https://example.pl/atom'})
+
+
+def test_commented_out_and_script_links_are_ignored():
+    assert_same_feeds(
+        '<html><head>'
+        '<!-- <link type="application/rss+xml" href="/old.xml"> -->'
+        '<script>document.write(\'<link type="application/rss+xml" href="/js.xml">\');</script>'
+        '<link type="application/rss+xml" href="/feed/">'
+        '</head><body></body></html>',
+        {'https://example.pl/feed/'})
+
+
+def test_uppercase_tags_and_attributes():
+    assert_same_feeds(
+        '<HTML><HEAD><LINK REL="alternate" TYPE="application/rss+xml" HREF="/RSS">'
+        '</HEAD><BODY></BODY></HTML>',
+        {'https://example.pl/RSS'})
+
+
+def test_links_only_in_body_are_found():
+    assert_same_feeds(
+        '<html><head><title>No feeds here</title></head>'
+        '<body><p>Text</p><link type="application/rss+xml" href="body.xml"></body></html>',
+        {'https://example.pl/body.xml'})
+
+
+def test_scan_stops_at_end_of_head_once_a_feed_is_found():
+    page = ('<html><head><link type="application/rss+xml" href="/head.xml"></head>'
+            '<body><link type="application/atom+xml" href="/body.xml"></body></html>')
+    # The full parse sees both; the streamed scan stops reading after </head>
+    assert extract_feed_links_html(page, BASE_URL) == {'https://example.pl/head.xml',
+                                                       'https://example.pl/body.xml'}
+    assert scan_feed_links(chunked(page), BASE_URL, 'utf-8') == {'https://example.pl/head.xml'}
@@ -0,0 +1,32 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from feed_download import read_feed_body  # noqa: E402
+
+
+def feed(title='News', items=200):
+    body = ''.join(f'<item><title>Q&A {i}</title><link>http://x/{i}</link></item>'
+                   for i in range(items))
+    return (f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+            f'<title>{title}</title>{body}</channel></rss>').encode('utf-8')
+
+
+def chunked(data, size=4096):
+    return (data[index:index + size] for index in range(0, len(data), size))
+
+
+def test_item_cap_holds_for_feeds_with_a_bare_ampersand():
+    content, truncated = read_feed_body(chunked(feed()), max_items=5)
+    assert truncated
+    assert content.count(b'</item>') == 5
+    assert content.endswith(b'</item></channel></rss>')
+
+
+def test_oversized_feed_with_an_early_error_is_cut_not_refused():
+    data = feed(title='Tom & Jerry')
+    content, truncated = read_feed_body(chunked(data), max_bytes=6000)
+    assert truncated
+    assert content.endswith(b'</item></channel></rss>')
+    assert len(content) < len(data)